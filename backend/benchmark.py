@@ -0,0 +1,369 @@
+# benchmark.py
+"""Benchmark suite for the tracking pipeline.
+
+Runs track_video over the bundled clips (../src/assets/*.mov) and/or
+synthetic videos of a given length and resolution, for one or more
+models, and records per case:
+
+    decode_fps        frames/s for a decode-only pass
+    inference_fps     frames/s for batched detection on frames already in memory
+    tracking_ms       ByteTrack association time per frame
+    postprocess_ms    building track dicts and writing output, per frame
+    end_to_end_fps    frames/s for a full track_video() run
+    peak_rss_mb       peak resident memory of the process that ran the case
+    output_bytes      size of the written track file
+
+Each case runs in a fresh process so peak RSS and model caches don't leak
+between cases. Results are JSON, tagged with the git commit, so runs can
+be compared across commits and models:
+
+    python benchmark.py
+    python benchmark.py --models yolov8n.pt yolov8s.pt --synthetic 60x1280x720 --synthetic 20x1920x1080@50
+    python benchmark.py --backends torch onnx openvino --threads 4
+    python benchmark.py --compare bench_results/abc123.json bench_results/def456.json
+
+--decode-only skips the model entirely and compares decoder backends
+(decoders.py) on the same clips, sequential reads and seeks:
+
+    python benchmark.py --decode-only --decoders opencv pyav ffmpeg --decode-threads 0 4
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from decoders import DECODER, DECODERS, available_decoders, open_decoder
+from metrics import peak_rss_bytes
+
+ASSETS_GLOB = "../src/assets/*.mov"
+RESULTS_DIR = "bench_results"
+
+# Frames held in memory for the inference-only measurement
+MAX_INFER_FRAMES = 256
+
+# Random seeks timed per clip by --decode-only
+SEEKS = 10
+
+# Headline metrics for --compare, and whether bigger is better
+COMPARE_METRICS = {
+    "decode_fps": True,
+    "inference_fps": True,
+    "tracking_ms": False,
+    "postprocess_ms": False,
+    "end_to_end_fps": True,
+    "peak_rss_mb": False,
+    "output_bytes": False,
+    "decode_fps_reuse": True,
+    "seek_ms": False,
+}
+
+
+def parse_synthetic(spec):
+    """Parses "SECONDSxWIDTHxHEIGHT[@FPS]", e.g. "60x1280x720@25"."""
+    size, _, fps = spec.partition("@")
+    try:
+        seconds, width, height = size.split("x")
+        return float(seconds), int(width), int(height), float(fps or 25)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SECONDSxWIDTHxHEIGHT[@FPS], got {spec!r}")
+
+
+def make_synthetic_video(path, seconds, width, height, fps=25.0, people=22, seed=0):
+    """Writes a pitch-green video with person-sized blobs moving across it.
+
+    The detector won't find many people in it, but decode, resize and
+    inference cost depend only on length and resolution, which is what the
+    synthetic cases are for.
+    """
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not create video: {path}")
+
+    bw, bh = max(4, width // 60), max(8, height // 12)
+    pos = rng.uniform([0, 0], [width - bw, height - bh], size=(people, 2))
+    vel = rng.uniform(-3, 3, size=(people, 2)) * (width / 1280)
+    colors = rng.integers(0, 255, size=(people, 3))
+    background = np.zeros((height, width, 3), np.uint8)
+    background[:] = (40, 140, 50)
+
+    for _ in range(round(seconds * fps)):
+        frame = background.copy()
+        pos += vel
+        bounce = (pos < 0) | (pos > [width - bw, height - bh])
+        vel[bounce] *= -1
+        pos = np.clip(pos, 0, [width - bw, height - bh])
+        for (x, y), color in zip(pos.astype(int), colors):
+            cv2.rectangle(frame, (x, y), (x + bw, y + bh), tuple(int(c) for c in color), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def peak_rss_mb():
+    return peak_rss_bytes() / (1024 * 1024)
+
+
+def bench_decode(video_path, decoder=DECODER, threads=0, reuse=False):
+    start = time.perf_counter()
+    with open_decoder(video_path, decoder, threads, reuse) as video:
+        n = sum(1 for _ in video)
+    seconds = time.perf_counter() - start
+    return n, n / seconds if seconds > 0 else 0.0
+
+
+def bench_seek(video_path, decoder=DECODER, threads=0, seeks=SEEKS, seed=0):
+    """Mean milliseconds to seek to a random frame and decode it."""
+    with open_decoder(video_path, decoder, threads) as video:
+        targets = np.random.default_rng(seed).integers(0, max(1, video.frame_count), seeks)
+        start = time.perf_counter()
+        for target in targets:
+            video.seek(int(target))
+            video.read()
+        return (time.perf_counter() - start) / seeks * 1000
+
+
+def run_decode_case(case):
+    """Decode-only case: no model, just the decoder backend on one clip."""
+    video, decoder, threads = case["video"], case["decoder"], case["threads"]
+    result = {"video": video, "decoder": decoder, "threads": threads}
+    result["frames"], result["decode_fps"] = bench_decode(video, decoder, threads)
+    _, result["decode_fps_reuse"] = bench_decode(video, decoder, threads, reuse=True)
+    result["seek_ms"] = bench_seek(video, decoder, threads)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_case(case):
+    """Runs one benchmark case in the current process and returns its metrics."""
+    import track_video as tv
+    from inference import load_model
+
+    video, model_name, options = case["video"], case["model"], case["options"]
+    backend = case.get("backend", "torch")
+    result = {"video": video, "model": model_name, "backend": backend, "options": options}
+
+    decoder = options.get("decoder", DECODER)
+    frames, result["decode_fps"] = bench_decode(video, decoder)
+    result["frames"] = frames
+
+    export_start = time.perf_counter()
+    model = load_model(model_name, backend, case.get("threads"), warm=False)
+    result["load_seconds"] = time.perf_counter() - export_start
+    batch_size = options.get("batch_size", tv.BATCH_SIZE)
+    imgsz = options.get("imgsz")
+
+    with open_decoder(video, decoder) as source:
+        sample = list(tv.read_frames(source, MAX_INFER_FRAMES))
+    # Warm-up pass so one-off setup doesn't count against inference
+    tv.detect_batch(model, sample[:batch_size], imgsz)
+
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(sample), batch_size):
+        results.extend(tv.detect_batch(model, sample[i:i + batch_size], imgsz))
+    infer = time.perf_counter() - start
+    result["inference_fps"] = len(sample) / infer if infer > 0 else 0.0
+
+    tracker = tv.load_tracker()
+    start = time.perf_counter()
+    rows = [tv.update_tracker(tracker, r) for r in results]
+    result["tracking_ms"] = (time.perf_counter() - start) / len(rows) * 1000 if rows else 0.0
+
+    from track_format import open_writer
+
+    fmt = options.get("fmt", "json")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        writer = open_writer(fmt, Path(tmp) / "post.out", {"videoW": 0, "videoH": 0, "fps": 25.0})
+        for i, r in enumerate(rows):
+            writer.write_frame({"frame": i, "t": i / 25.0, "tracks": tv.rows_to_tracks(r)})
+        writer.close()
+        result["postprocess_ms"] = (time.perf_counter() - start) / len(rows) * 1000 if rows else 0.0
+
+        out = Path(tmp) / f"tracks{tv.SUFFIXES[fmt]}"
+        stats = tv.track_video(model, video, out, **options)
+        result["end_to_end_fps"] = stats["fps"]
+        result["detected"] = stats["detected"]
+        result["output_bytes"] = out.stat().st_size
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def _run_case_child(case, conn):
+    try:
+        run = run_decode_case if "decoder" in case else run_case
+        conn.send(("ok", run(case)))
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def run_case_isolated(case):
+    """Runs a case in a fresh spawned process so its peak RSS is its own."""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_case_child, args=(case, child))
+    proc.start()
+    child.close()
+    try:
+        status, payload = parent.recv()
+    except EOFError:
+        status, payload = "error", f"benchmark process died (exit code {proc.exitcode})"
+    proc.join()
+    if status != "ok":
+        raise RuntimeError(payload)
+    return payload
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+    }
+
+
+def _case_key(case):
+    # Decode-only cases are keyed by decoder and thread count instead of model
+    if "decoder" in case:
+        return Path(case["video"]).name, f"{case['decoder']} x{case['threads']}"
+    backend = case.get("backend", "torch")
+    return Path(case["video"]).name, case["model"] if backend == "torch" else f"{case['model']} {backend}"
+
+
+def compare(old_path, new_path):
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    old_cases = {_case_key(c): c for c in old["results"]}
+    print(f"{old['env']['commit']} -> {new['env']['commit']}")
+    for case in new["results"]:
+        key = _case_key(case)
+        base = old_cases.get(key)
+        if base is None:
+            continue
+        print(f"\n{key[0]} [{key[1]}]")
+        for metric, higher_is_better in COMPARE_METRICS.items():
+            a, b = base.get(metric), case.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a * 100
+            better = (change > 0) == higher_is_better
+            print(f"  {metric:<16} {a:>12.2f} -> {b:>12.2f}  {change:+7.1f}% {'better' if better else 'worse'}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the tracking pipeline",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("videos", nargs="*", help=f"Videos or globs (default: {ASSETS_GLOB})")
+    parser.add_argument("--no-assets", action="store_true", help="Skip the bundled clips")
+    parser.add_argument("--synthetic", action="append", type=parse_synthetic, default=[],
+                        metavar="SECxWxH[@FPS]", help="Add a generated video; may be repeated")
+    parser.add_argument("--models", nargs="+", default=["yolov8n.pt"], help="YOLO weights to compare")
+    parser.add_argument("--backends", nargs="+", choices=("torch", "onnx", "openvino"), default=["torch"],
+                        help="Inference backends to compare (see inference.py)")
+    parser.add_argument("--threads", type=int, help="Inference threads (default: the backend's own)")
+    parser.add_argument("--batch-size", type=int, help="Frames per detector forward pass")
+    parser.add_argument("--format", dest="fmt", default="json", help="Output format for track_video")
+    parser.add_argument("--stride", type=int, help="Detector stride")
+    parser.add_argument("--imgsz", type=int, help="Inference image size")
+    parser.add_argument("--no-pipeline", action="store_true", help="Benchmark the single-threaded path")
+    parser.add_argument("--decoder", choices=DECODERS, help="Decoder backend for model cases")
+    parser.add_argument("--decode-only", action="store_true",
+                        help="Only compare decoder backends; no model is loaded")
+    parser.add_argument("--decoders", nargs="+", choices=DECODERS[1:],
+                        help="Backends for --decode-only (default: every available one)")
+    parser.add_argument("--decode-threads", nargs="+", type=int, default=[0],
+                        help="Decoder thread counts for --decode-only; 0 is the backend default")
+    parser.add_argument("-o", "--out", help=f"Results file (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two results files and exit")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    patterns = args.videos or ([] if args.no_assets else [ASSETS_GLOB])
+    videos = [v for p in patterns for v in (sorted(glob.glob(p)) if glob.has_magic(p) else [p])]
+
+    options = {"fmt": args.fmt, "pipelined": not args.no_pipeline}
+    for key in ("batch_size", "stride", "imgsz", "decoder"):
+        if getattr(args, key) is not None:
+            options[key] = getattr(args, key)
+
+    env = environment()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (seconds, width, height, fps) in enumerate(args.synthetic):
+            path = Path(tmp) / f"synthetic_{i}_{width}x{height}_{seconds:g}s.mp4"
+            print(f"Generating {path.name}...", file=sys.stderr)
+            videos.append(str(make_synthetic_video(path, seconds, width, height, fps)))
+
+        if args.decode_only:
+            decoders = args.decoders or available_decoders()
+            cases = [{"video": v, "decoder": d, "threads": t}
+                     for v in videos for d in decoders for t in args.decode_threads]
+        else:
+            cases = [{"video": v, "model": m, "backend": b, "threads": args.threads, "options": options}
+                     for v in videos for m in args.models for b in args.backends]
+
+        for case in cases:
+            label = _case_key(case)[1]
+            print(f"Benchmarking {Path(case['video']).name} with {label}...", file=sys.stderr)
+            try:
+                result = run_case_isolated(case)
+            except RuntimeError as e:
+                print(f"Error: {case['video']} [{label}]: {e}", file=sys.stderr)
+                continue
+            results.append(result)
+            if args.decode_only:
+                print(
+                    f"  decode {result['decode_fps']:.1f} fps ({result['decode_fps_reuse']:.1f} reusing buffers), "
+                    f"seek {result['seek_ms']:.1f} ms, peak RSS {result['peak_rss_mb']:.0f} MB",
+                    file=sys.stderr,
+                )
+            else:
+                print(
+                    f"  decode {result['decode_fps']:.1f} fps, inference {result['inference_fps']:.1f} fps, "
+                    f"end-to-end {result['end_to_end_fps']:.1f} fps, peak RSS {result['peak_rss_mb']:.0f} MB",
+                    file=sys.stderr,
+                )
+
+    suffix = "_decode" if args.decode_only else ""
+    out = Path(args.out or Path(RESULTS_DIR) / f"{env['commit']}{suffix}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"env": env, "results": results}, indent=2))
+    print(f"Wrote {out} with {len(results)} results")
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# checkpoint.py
+"""Checkpoints for resuming long track_video runs.
+
+A checkpoint records how far a run got: the next frame to decode, how many
+bytes of the jsonl output were flushed up to that frame, the writer's
+index, and a pickle of the ByteTrack state, including the global track id
+counter, so a resumed run keeps the same ids instead of starting again
+from 1, and the stride gate's state (track_stride.DetectGate) as of the
+checkpoint frame, so frames after it are gated as they would have been.
+
+Checkpoints are only taken on frames that went through the detector. At
+those frames there are no skipped frames waiting to be interpolated, so
+the output up to the checkpoint is final.
+
+The input's size and mtime are recorded too, so a video that was replaced
+or re-encoded under the same name isn't resumed into. So are the run's
+tracking settings (track_video.cache_settings), and a checkpoint taken
+under different settings (model, stride, imgsz, ROI, ...) is refused
+rather than continued with mismatched tracker state.
+"""
+import os
+import pickle
+from pathlib import Path
+
+from ultralytics.trackers.basetrack import BaseTrack
+
+CHECKPOINT_VERSION = 2
+
+
+def checkpoint_path_for(out_path):
+    # ../public/bruno_tracks.jsonl -> ../public/bruno_tracks.jsonl.ckpt
+    out_path = Path(out_path)
+    return out_path.with_name(out_path.name + ".ckpt")
+
+
+def snapshot_tracker(tracker):
+    """Pickles the tracker together with the process-wide track id counter."""
+    return pickle.dumps({"tracker": tracker, "next_id": BaseTrack._count})
+
+
+def restore_tracker(blob):
+    state = pickle.loads(blob)
+    BaseTrack._count = state["next_id"]
+    return state["tracker"]
+
+
+def video_stamp(video_path):
+    """Size and modification time of the input, to tell if it changed since a checkpoint."""
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def save_checkpoint(path, state):
+    # Write then rename so a crash mid-save leaves the previous checkpoint intact
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(dict(state, version=CHECKPOINT_VERSION), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _changed_settings(old, new, prefix=""):
+    # Names of the (nested) settings that differ, e.g. ["model", "options.stride"]
+    changed = []
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        if isinstance(a, dict) and isinstance(b, dict):
+            changed += _changed_settings(a, b, f"{prefix}{key}.")
+        elif a != b:
+            changed.append(prefix + key)
+    return changed
+
+
+def load_checkpoint(path, video_path, settings=None):
+    """Loads a checkpoint, checking it belongs to this video, output and settings."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} was written by an incompatible version; delete it to start over")
+    if state["video"] != video_stamp(video_path):
+        raise ValueError(f"{path} is for a different video than {video_path}, or it has changed since")
+    if settings is not None and state.get("settings") != settings:
+        changed = _changed_settings(state.get("settings") or {}, settings)
+        raise ValueError(f"{path} was taken with different settings ({', '.join(changed)}); "
+                         f"rerun with the original settings or delete it to start over")
+    return state
@@ -0,0 +1,253 @@
+# decoders.py
+"""Pluggable video decoders.
+
+Every backend yields BGR uint8 NumPy frames of shape (h, w, 3), the same as
+cv2.VideoCapture, so they're interchangeable anywhere in the pipeline:
+
+opencv   cv2.VideoCapture, with its decode thread count set when the
+         OpenCV build supports it. Always available.
+pyav     PyAV (pip install av). Frame-threaded decode with a configurable
+         thread count, and seeks that jump to the nearest keyframe before
+         the target and decode forward from there.
+ffmpeg   An ffmpeg subprocess writing raw bgr24 to a pipe. Each frame is
+         read straight into its own NumPy array with readinto(), so there is
+         no intermediate bytes object. Seeking restarts ffmpeg with -ss
+         before -i (keyframe seek, then accurate decode to the target).
+         Needs ffmpeg and ffprobe on PATH.
+
+"auto" picks the first available of pyav, ffmpeg, opencv.
+
+With reuse=True the opencv and ffmpeg decoders write every frame into the
+same buffer. That saves an allocation per frame but is only safe when the
+caller is done with a frame before reading the next one (no prefetch
+queues).
+
+Usage (decode-only benchmark of every available backend):
+    python benchmark.py --decode-only --decoders opencv pyav ffmpeg
+"""
+import json
+import shutil
+import subprocess
+from fractions import Fraction
+
+import cv2
+import numpy as np
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+DECODERS = ("auto", "opencv", "pyav", "ffmpeg")
+DECODER = "opencv"
+
+# Decode threads; 0 lets the backend choose (usually one per core)
+THREADS = 0
+
+
+class Decoder:
+    """Common interface: metadata attributes plus read(), seek() and close()."""
+
+    name = None
+    fps = 0.0
+    width = 0
+    height = 0
+    frame_count = 0
+
+    def read(self):
+        """Returns the next frame, or None at the end of the video."""
+        raise NotImplementedError
+
+    def seek(self, frame_idx):
+        """Positions the decoder so the next read() returns frame frame_idx."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class OpenCVDecoder(Decoder):
+    name = "opencv"
+
+    def __init__(self, path, threads=THREADS, reuse=False):
+        params = [cv2.CAP_PROP_N_THREADS, threads] if threads and hasattr(cv2, "CAP_PROP_N_THREADS") else []
+        self.cap = cv2.VideoCapture(str(path), cv2.CAP_ANY, params)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video: {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.reuse = reuse
+        self._buffer = None
+
+    def read(self):
+        # Passing the previous frame in lets OpenCV decode into it in place
+        ok, frame = self.cap.read(self._buffer) if self._buffer is not None else self.cap.read()
+        if not ok:
+            return None
+        if self.reuse:
+            self._buffer = frame
+        return frame
+
+    def seek(self, frame_idx):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+
+    def close(self):
+        self.cap.release()
+
+
+class PyAVDecoder(Decoder):
+    name = "pyav"
+
+    def __init__(self, path, threads=THREADS, reuse=False):
+        if not AV_AVAILABLE:
+            raise RuntimeError("The pyav decoder needs PyAV: pip install av")
+        self.container = av.open(str(path))
+        self.stream = self.container.streams.video[0]
+        # Frame threading decodes several frames at once; slice threading
+        # alone barely helps H.264 at these resolutions
+        self.stream.thread_type = "AUTO"
+        if threads:
+            self.stream.thread_count = threads
+        ctx = self.stream.codec_context
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate or 0)
+        self.width, self.height = ctx.width, ctx.height
+        self.frame_count = self.stream.frames or round(float(self.stream.duration or 0) * self.stream.time_base * self.fps)
+        self._start = self.stream.start_time or 0
+        self._frames = self.container.decode(self.stream)
+        self._skip_to = None
+
+    def _index(self, frame):
+        return round(float((frame.pts - self._start) * self.stream.time_base) * self.fps)
+
+    def read(self):
+        for frame in self._frames:
+            if self._skip_to is not None:
+                # Decoding forward from the keyframe seek() landed on
+                if frame.pts is not None and self._index(frame) < self._skip_to:
+                    continue
+                self._skip_to = None
+            # PyAV converts into a fresh array per frame, so reuse has nothing to save here
+            return frame.to_ndarray(format="bgr24")
+        return None
+
+    def seek(self, frame_idx):
+        pts = self._start + int(frame_idx / self.fps / float(self.stream.time_base))
+        # backward=True lands on the last keyframe at or before pts
+        self.container.seek(pts, stream=self.stream, backward=True, any_frame=False)
+        self._frames = self.container.decode(self.stream)
+        self._skip_to = frame_idx
+
+    def close(self):
+        self.container.close()
+
+
+def probe(path):
+    """Stream metadata from ffprobe: (width, height, fps, frame_count)."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_streams", "-of", "json", str(path)],
+        capture_output=True, text=True,
+    )
+    streams = json.loads(out.stdout or "{}").get("streams") if out.returncode == 0 else None
+    if not streams:
+        raise RuntimeError(f"Could not open video: {path}")
+    s = streams[0]
+    width, height = int(s["width"]), int(s["height"])
+    # ffmpeg auto-rotates phone footage, so report the rotated size
+    rotation = int(s.get("tags", {}).get("rotate", 0))
+    for side in s.get("side_data_list", []):
+        rotation = int(side.get("rotation", rotation))
+    if rotation % 180:
+        width, height = height, width
+    fps = float(Fraction(s.get("avg_frame_rate") or "0/1")) if s.get("avg_frame_rate") != "0/0" else 0.0
+    return width, height, fps, int(s.get("nb_frames") or 0)
+
+
+class FFmpegPipeDecoder(Decoder):
+    name = "ffmpeg"
+
+    def __init__(self, path, threads=THREADS, reuse=False):
+        if not FFMPEG_AVAILABLE:
+            raise RuntimeError("The ffmpeg decoder needs ffmpeg and ffprobe on PATH")
+        self.path = str(path)
+        self.threads = threads
+        self.reuse = reuse
+        self.width, self.height, self.fps, self.frame_count = probe(path)
+        self._frame_bytes = self.width * self.height * 3
+        self._buffer = None
+        self._proc = None
+        self._start(0)
+
+    def _start(self, frame_idx):
+        self.close()
+        cmd = ["ffmpeg", "-v", "error", "-nostdin"]
+        if frame_idx:
+            # -ss before -i seeks to a keyframe, then decodes accurately to the target
+            cmd += ["-ss", f"{frame_idx / self.fps:.6f}"]
+        cmd += ["-threads", str(self.threads), "-i", self.path, "-map", "0:v:0",
+                "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=self._frame_bytes)
+
+    def read(self):
+        if self._buffer is not None and self.reuse:
+            frame = self._buffer
+        else:
+            frame = np.empty((self.height, self.width, 3), np.uint8)
+        view = memoryview(frame).cast("B")
+        got = 0
+        while got < self._frame_bytes:
+            n = self._proc.stdout.readinto(view[got:])
+            if not n:
+                return None
+            got += n
+        self._buffer = frame
+        return frame
+
+    def seek(self, frame_idx):
+        self._start(frame_idx)
+
+    def close(self):
+        if self._proc is not None:
+            self._proc.stdout.close()
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+
+_BACKENDS = {
+    "opencv": OpenCVDecoder,
+    "pyav": PyAVDecoder,
+    "ffmpeg": FFmpegPipeDecoder,
+}
+
+
+def available_decoders():
+    return [name for name, ok in (("pyav", AV_AVAILABLE), ("ffmpeg", FFMPEG_AVAILABLE), ("opencv", True)) if ok]
+
+
+def open_decoder(path, backend=DECODER, threads=THREADS, reuse=False):
+    """Opens path with the named backend ("auto" for the best available one)."""
+    if backend in (None, "auto"):
+        backend = available_decoders()[0]
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown decoder {backend!r}; expected one of {', '.join(DECODERS)}")
+    return _BACKENDS[backend](path, threads=threads, reuse=reuse)
+
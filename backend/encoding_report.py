@@ -0,0 +1,96 @@
+# encoding_report.py
+"""Size versus error of every output format and coordinate encoding.
+
+Re-encodes an existing track file in each format x encoding (see
+track_format.py), loads every variant back and reports, against the float
+original:
+
+    bytes        file size on disk
+    gzip         size after gzip -6 (what a static host would serve)
+    load_ms      load_columns() time, best of a few runs
+    bbox_max/mean_px   largest and mean absolute bbox coordinate error, pixels
+    conf_max     largest absolute confidence error
+
+Usage:
+    python encoding_report.py
+    python encoding_report.py ../public/bruno_tracks.json --json report.json
+"""
+import argparse
+import gzip
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from track_format import ENCODINGS, FORMATS, SUFFIXES, load_columns, save_columns
+
+TRACKS_PATH = "../public/bruno_tracks.json"
+LOAD_RUNS = 5
+
+
+def measure(path, columns):
+    data = Path(path).read_bytes()
+    load_seconds = []
+    for _ in range(LOAD_RUNS):
+        start = time.perf_counter()
+        _, decoded = load_columns(path)
+        load_seconds.append(time.perf_counter() - start)
+
+    bbox_err = np.abs(decoded["bbox"].astype(np.float64) - columns["bbox"])
+    conf_err = np.abs(decoded["conf"].astype(np.float64) - columns["conf"])
+    return {
+        "bytes": len(data),
+        "gzip": len(gzip.compress(data, compresslevel=6)),
+        "load_ms": min(load_seconds) * 1000,
+        "bbox_max_px": float(bbox_err.max()) if bbox_err.size else 0.0,
+        "bbox_mean_px": float(bbox_err.mean()) if bbox_err.size else 0.0,
+        "conf_max": float(conf_err.max()) if conf_err.size else 0.0,
+    }
+
+
+def run_report(tracks_path):
+    meta, columns = load_columns(tracks_path)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            for encoding in ENCODINGS:
+                if encoding == "delta" and fmt != "columnar":
+                    continue
+                path = Path(tmp) / f"{encoding}{SUFFIXES[fmt]}"
+                save_columns(path, meta, columns, fmt=fmt, encoding=encoding)
+                results.append({"format": fmt, "encoding": encoding, **measure(path, columns)})
+    return results
+
+
+def print_report(results):
+    baseline = next(r["gzip"] for r in results if r["format"] == "json" and r["encoding"] == "float")
+    print(f"{'format':<10} {'encoding':<10} {'bytes':>9} {'gzip':>8} {'vs json':>8} "
+          f"{'load_ms':>8} {'bbox_max':>9} {'bbox_mean':>9} {'conf_max':>9}")
+    for r in results:
+        print(f"{r['format']:<10} {r['encoding']:<10} {r['bytes']:>9} {r['gzip']:>8} "
+              f"{r['gzip'] / baseline:>7.0%} {r['load_ms']:>8.2f} {r['bbox_max_px']:>9.3f} "
+              f"{r['bbox_mean_px']:>9.3f} {r['conf_max']:>9.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare track output encodings by size and error")
+    parser.add_argument("tracks", nargs="?", default=TRACKS_PATH,
+                        help=f"Full-precision track file to re-encode (default: {TRACKS_PATH})")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not Path(args.tracks).exists():
+        print(f"Error: {args.tracks} not found", file=sys.stderr)
+        return 1
+    results = run_report(args.tracks)
+    print_report(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# inference.py
+"""Inference backends for the YOLO detector.
+
+torch      The .pt weights in PyTorch eager mode (the default).
+onnx       The weights exported to ONNX and run by ONNX Runtime.
+openvino   The weights exported to OpenVINO IR, usually the fastest on Intel CPUs.
+
+Exports are made once and cached under MODEL_DIR, keyed by the weights'
+content, the backend and the Ultralytics version, so later runs and worker
+processes just load them. Every export is fp32 with dynamic input shapes:
+that lets the exported model take the same batches and the same minimal
+letterbox padding as the .pt model, and NMS still runs in Ultralytics
+afterwards with the same conf/iou/classes. The boxes only differ by float
+rounding, so ByteTrack sees the same detections whichever backend runs.
+
+Usage (export ahead of time, e.g. while building a deploy image):
+    python inference.py yolov8n.pt --backend openvino
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from ultralytics import YOLO, __version__ as ULTRALYTICS_VERSION
+
+from track_cache import file_digest
+
+BACKENDS = ("torch", "onnx", "openvino")
+BACKEND = "torch"
+
+MODEL_DIR = Path(os.getenv("TRACK_MODEL_DIR", Path.home() / ".cache" / "project-ph" / "models"))
+
+# Export arguments; part of the cache key
+EXPORT_ARGS = {"dynamic": True, "half": False, "simplify": True}
+
+# Forward passes run before timing-sensitive work, on frames of this shape
+WARMUP_RUNS = 2
+WARMUP_SHAPE = (720, 1280, 3)
+
+
+def export_model(model_name, backend, model_dir=MODEL_DIR):
+    """Returns the path of model_name exported for backend, exporting it on first use."""
+    if backend == "torch":
+        return model_name
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+    # Loading by name resolves (and downloads, if needed) the weights file
+    weights = Path(YOLO(model_name).ckpt_path or model_name)
+    material = {
+        "weights": file_digest(weights),
+        "backend": backend,
+        "ultralytics": ULTRALYTICS_VERSION,
+        "args": EXPORT_ARGS,
+    }
+    key = hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    entry = Path(model_dir) / f"{weights.stem}-{backend}-{key}"
+    marker = entry / "model.json"
+    if marker.exists():
+        return str(entry / json.loads(marker.read_text())["path"])
+
+    print(f"Exporting {model_name} for {backend}...", file=sys.stderr)
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    # Export into a temp dir and rename it into place, so a concurrent or
+    # interrupted export never leaves a half-written entry behind
+    tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".tmp-"))
+    try:
+        shutil.copyfile(weights, tmp / weights.name)
+        exported = Path(YOLO(str(tmp / weights.name)).export(format=backend, verbose=False, **EXPORT_ARGS))
+        (tmp / weights.name).unlink()
+        rel = exported.relative_to(tmp)
+        (tmp / "model.json").write_text(json.dumps({"path": str(rel), **material}))
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # Another process finished the same export first
+            if not marker.exists():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return str(entry / json.loads(marker.read_text())["path"])
+
+
+def set_threads(model, backend, threads):
+    """Limits the detector to `threads` CPU threads.
+
+    ONNX Runtime and OpenVINO fix their thread pools when the session is
+    created, so for those the predictor's session is rebuilt.
+    """
+    if not threads:
+        return
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+        return
+
+    runtime = model.predictor.model
+    # For exported models this is the .onnx file or the OpenVINO model directory
+    path = Path(model.ckpt_path)
+    if backend == "onnx" and hasattr(runtime, "session"):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        runtime.session = ort.InferenceSession(
+            str(path), sess_options=options, providers=runtime.session.get_providers(),
+        )
+    elif backend == "openvino" and hasattr(runtime, "ov_compiled_model"):
+        import openvino as ov
+
+        core = ov.Core()
+        xml = next(path.glob("*.xml"))
+        runtime.ov_compiled_model = core.compile_model(core.read_model(xml), "CPU", {
+            "INFERENCE_NUM_THREADS": threads,
+            "PERFORMANCE_HINT": getattr(runtime, "inference_mode", "LATENCY"),
+        })
+
+
+def warmup(model, batch_size=1, imgsz=None, shape=WARMUP_SHAPE, runs=WARMUP_RUNS):
+    """Runs a few forward passes so one-off setup doesn't land on the first real batch."""
+    frames = [np.zeros(shape, np.uint8)] * batch_size
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    for _ in range(runs):
+        model.predict(source=frames, verbose=False, **kwargs)
+
+
+def load_model(model_name, backend=BACKEND, threads=None, batch_size=1, imgsz=None, warm=True):
+    """Loads the detector for a backend: exported if needed, thread-limited and warmed up."""
+    model = YOLO(export_model(model_name, backend), task="detect")
+    if backend == "torch":
+        set_threads(model, backend, threads)
+    elif threads:
+        # The predictor (and its runtime session) only exists after a first call
+        model.predict(source=[np.zeros(WARMUP_SHAPE, np.uint8)], verbose=False)
+        set_threads(model, backend, threads)
+    if warm:
+        warmup(model, batch_size, imgsz)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO weights for an inference backend")
+    parser.add_argument("model", help="YOLO weights, e.g. yolov8n.pt")
+    parser.add_argument("--backend", choices=BACKENDS[1:], default="onnx", help="Backend to export for (default: onnx)")
+    parser.add_argument("--model-dir", default=str(MODEL_DIR), help=f"Export cache (default: {MODEL_DIR})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = export_model(args.model, args.backend, args.model_dir)
+    print(f"{path} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# metrics.py
+"""Per-stage instrumentation for track_video.
+
+Metrics collects, for one run:
+
+stages      wall time of every call to each pipeline stage (decode, gate,
+            inference, tracking, build, write), as a summary per stage
+histograms  per-frame values: frame latency (decoded -> written) in
+            seconds, and detections per frame
+peak RSS    the process's memory high-water mark
+
+and exports them as JSON or Prometheus text (write()), plus optionally a
+Chrome trace (write_trace(); open it in chrome://tracing or Perfetto) with
+one slice per stage call on the thread that made it.
+
+Instrumented code calls metrics.stage(name) / observe() / timed() on
+whatever it was given. NULL_METRICS has the same interface but does
+nothing: stage() hands back one shared no-op context manager and timed()
+returns the iterable untouched, so uninstrumented runs pay a method call
+per stage and nothing more.
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+# Bucket upper bounds for the Prometheus histograms; anything not listed
+# is exported as a summary only
+BUCKETS = {
+    "frame_latency_seconds": (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    "detections_per_frame": (0, 1, 2, 5, 10, 15, 20, 25, 30, 40, 60),
+}
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _label_value(value):
+    # Prometheus text format: label values escape backslash, quote and newline
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Metrics:
+    def __init__(self, trace=False, labels=None):
+        self.labels = labels or {}
+        self.stages = {}
+        self.values = {}
+        self.counters = {}
+        self.trace = [] if trace else None
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def stage(self, name):
+        """Context manager timing one call of a stage."""
+        return _Stage(self, name)
+
+    def record(self, name, start, end):
+        # array.append is atomic under the GIL; only creating a series needs the lock
+        series = self.stages.get(name)
+        if series is None:
+            with self._lock:
+                series = self.stages.setdefault(name, array("d"))
+        series.append(end - start)
+        if self.trace is not None:
+            tid = threading.get_ident()
+            if tid not in self._threads:
+                # Named now; the thread may be gone by the time the trace is written
+                self._threads[tid] = threading.current_thread().name
+            self.trace.append((name, start, end, tid))
+
+    def timed(self, name, iterable):
+        """Wraps an iterable so each next() is timed as a call of stage name."""
+        it = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            self.record(name, start, time.perf_counter())
+            yield item
+
+    def observe(self, name, value):
+        series = self.values.get(name)
+        if series is None:
+            with self._lock:
+                series = self.values.setdefault(name, array("d"))
+        series.append(value)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        def summarize(series):
+            a = np.frombuffer(series, dtype=np.float64) if len(series) else np.zeros(0)
+            out = {"count": len(a), "sum": float(a.sum())}
+            if len(a):
+                out.update({"mean": float(a.mean()), "max": float(a.max())})
+                out.update({f"p{round(q * 100)}": float(np.quantile(a, q)) for q in QUANTILES})
+            return out
+
+        histograms = {}
+        for name, series in self.values.items():
+            histograms[name] = summarize(series)
+            if name in BUCKETS:
+                a = np.frombuffer(series, dtype=np.float64)
+                histograms[name]["buckets"] = {
+                    str(le): int(np.count_nonzero(a <= le)) for le in BUCKETS[name]
+                }
+        return {
+            "labels": self.labels,
+            "wall_seconds": time.perf_counter() - self._origin,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "counters": dict(self.counters),
+            "stages": {name: summarize(series) for name, series in self.stages.items()},
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self):
+        data = self.to_dict()
+
+        def labels(**extra):
+            items = dict(self.labels, **extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in items.items()) + "}"
+
+        lines = [
+            "# HELP track_wall_seconds Wall time of the tracking run",
+            "# TYPE track_wall_seconds gauge",
+            f"track_wall_seconds{labels()} {data['wall_seconds']}",
+            "# HELP track_peak_rss_bytes Peak resident memory of the process",
+            "# TYPE track_peak_rss_bytes gauge",
+            f"track_peak_rss_bytes{labels()} {data['peak_rss_bytes']}",
+        ]
+        for name, value in data["counters"].items():
+            lines += [f"# TYPE track_{name}_total counter", f"track_{name}_total{labels()} {value}"]
+
+        lines += ["# HELP track_stage_seconds Time per call of each pipeline stage",
+                  "# TYPE track_stage_seconds summary"]
+        for name, s in data["stages"].items():
+            for q in QUANTILES:
+                if s["count"]:
+                    lines.append(f"track_stage_seconds{labels(stage=name, quantile=q)} {s[f'p{round(q * 100)}']}")
+            lines.append(f"track_stage_seconds_sum{labels(stage=name)} {s['sum']}")
+            lines.append(f"track_stage_seconds_count{labels(stage=name)} {s['count']}")
+
+        for name, h in data["histograms"].items():
+            metric = f"track_{name}"
+            if "buckets" in h:
+                lines.append(f"# TYPE {metric} histogram")
+                for le, n in h["buckets"].items():
+                    lines.append(f"{metric}_bucket{labels(le=le)} {n}")
+                lines.append(f"{metric}_bucket{labels(le='+Inf')} {h['count']}")
+            else:
+                lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_sum{labels()} {h['sum']}")
+            lines.append(f"{metric}_count{labels()} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes Prometheus text for .prom/.txt paths, JSON otherwise."""
+        path = Path(path)
+        if path.suffix in (".prom", ".txt"):
+            path.write_text(self.to_prometheus())
+        else:
+            path.write_text(json.dumps(self.to_dict(), indent=2))
+
+    def write_trace(self, path):
+        """Writes the stage calls as a Chrome trace (Trace Event Format) JSON file."""
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._threads.items()
+        ]
+        for name, start, end, tid in self.trace or ():
+            events.append({
+                "name": name,
+                "ph": "X",
+                "pid": pid,
+                "tid": tid,
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+            })
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """Metrics that records nothing, for uninstrumented runs."""
+
+    trace = None
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def record(self, name, start, end):
+        pass
+
+    def timed(self, name, iterable):
+        return iterable
+
+    def observe(self, name, value):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_METRICS = NullMetrics()
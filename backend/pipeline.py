@@ -0,0 +1,114 @@
+# pipeline.py
+"""Small threading helpers for running tracker stages concurrently.
+
+The decode, inference and post-processing stages of track_video are plain
+generators/callbacks. These helpers move a stage onto its own thread with a
+bounded queue in between, so a slow consumer applies backpressure to the
+producer instead of letting frames pile up in memory.
+"""
+import queue
+import threading
+
+# Sentinel marking the end of a stream
+_DONE = object()
+
+
+class _Raised:
+    # Carries an exception from a worker thread back to the consumer
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def prefetch(iterable, maxsize=8):
+    """Iterates `iterable` on a background thread, buffering up to maxsize items.
+
+    Exceptions raised by the producer are re-raised in the consumer. Closing
+    the returned generator early stops the producer after its current item.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        # Poll so a producer blocked on a full queue notices shutdown
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Raised(e))
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Raised):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class BackgroundWorker:
+    """Calls fn(item) for every item put(), on a dedicated thread.
+
+    put() blocks once maxsize items are waiting. close() drains the queue,
+    joins the thread and re-raises the first error fn raised, if any.
+    """
+
+    def __init__(self, fn, maxsize=8, name="worker"):
+        self._fn = fn
+        self._q = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is _DONE:
+                return
+            if self._error is not None:
+                # Keep draining so put() never blocks on a dead worker
+                continue
+            try:
+                self._fn(item)
+            except BaseException as e:
+                self._error = e
+
+    def put(self, item):
+        if self._error is not None:
+            raise self._error
+        self._q.put(item)
+
+    def close(self):
+        self._q.put(_DONE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't mask the original error with one from the worker
+            self._q.put(_DONE)
+            self._thread.join()
+        return False
@@ -0,0 +1,98 @@
+# roi.py
+"""Region-of-interest cropping for track_video.
+
+Players only appear on the pitch, so cropping frames to the pitch before
+detection cuts the pixels the model has to look at. Boxes found in the
+crop are shifted back to full-frame coordinates afterwards.
+
+An ROI is an (x1, y1, x2, y2) pixel tuple. It can be given explicitly or
+found automatically from the green of the pitch in a few sampled frames.
+"""
+import argparse
+
+import cv2
+import numpy as np
+
+from decoders import DECODER, open_decoder
+
+# HSV range treated as pitch grass (OpenCV hue is 0-179)
+GREEN_LOW = (35, 40, 40)
+GREEN_HIGH = (85, 255, 255)
+
+# Below this fraction of green pixels we don't trust the mask and keep the full frame
+MIN_GREEN_FRACTION = 0.15
+
+# Extra margin around the pitch, as a fraction of frame size. Players near
+# the far touchline stick out above the grass, so the top gets more room.
+PAD_X = 0.02
+PAD_TOP = 0.10
+PAD_BOTTOM = 0.02
+
+AUTO_SAMPLES = 5
+
+
+def parse_roi(spec):
+    """Parses "x1,y1,x2,y2" or "auto" into a tuple or the string "auto" (an argparse type)."""
+    if spec is None or spec == "auto":
+        return spec
+    try:
+        x1, y1, x2, y2 = (int(v) for v in spec.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ROI must be 'auto' or 'x1,y1,x2,y2', got {spec!r}")
+    if x2 <= x1 or y2 <= y1:
+        raise argparse.ArgumentTypeError(f"ROI {spec!r} is empty")
+    return x1, y1, x2, y2
+
+
+def pitch_mask(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, GREEN_LOW, GREEN_HIGH)
+    # Drop specks (shirts, ad boards) and close holes left by players and lines
+    kernel = np.ones((15, 15), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+
+def pitch_roi(frames):
+    """Bounding box of the pitch across frames, padded; None if no pitch is visible."""
+    h, w = frames[0].shape[:2]
+    combined = np.zeros((h, w), np.uint8)
+    for frame in frames:
+        combined |= pitch_mask(frame)
+
+    if np.count_nonzero(combined) < MIN_GREEN_FRACTION * h * w:
+        return None
+
+    contours, _ = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    x, y, bw, bh = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    return clamp_roi((
+        x - round(PAD_X * w),
+        y - round(PAD_TOP * h),
+        x + bw + round(PAD_X * w),
+        y + bh + round(PAD_BOTTOM * h),
+    ), w, h)
+
+
+def auto_roi(video_path, samples=AUTO_SAMPLES, decoder=DECODER):
+    """Samples frames spread over the video and returns the pitch ROI, or None."""
+    frames = []
+    with open_decoder(video_path, decoder) as video:
+        total = video.frame_count
+        for i in range(samples):
+            if total > 0:
+                video.seek(i * total // samples)
+            frame = video.read()
+            if frame is not None:
+                frames.append(frame)
+    return pitch_roi(frames) if frames else None
+
+
+def clamp_roi(roi, w, h):
+    x1, y1, x2, y2 = roi
+    return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+
+def crop(frame, roi):
+    # A view, not a copy
+    x1, y1, x2, y2 = roi
+    return frame[y1:y2, x1:x2]
@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+# The backend scripts import each other as siblings
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def write_video(path, frames=60, size=(160, 120), fps=30):
+    """Writes a clip of a white box moving across a black frame."""
+    w, h = size
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    for i in range(frames):
+        frame = np.zeros((h, w, 3), np.uint8)
+        x = 5 + (i * 2) % (w - 40)
+        frame[40:80, x:x + 20] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class FakeModel:
+    """Stands in for YOLO: "detects" the white box by thresholding."""
+
+    def predict(self, source, **kwargs):
+        import torch
+        from ultralytics.engine.results import Boxes
+
+        results = []
+        for frame in source:
+            ys, xs = np.nonzero(frame.max(axis=2) > 200)
+            data = torch.zeros((0, 6))
+            if len(xs):
+                data = torch.tensor([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 0]], dtype=torch.float32)
+            results.append(SimpleNamespace(boxes=Boxes(data, frame.shape[:2]), orig_img=frame))
+        return results
+
+
+@pytest.fixture
+def video(tmp_path):
+    return write_video(tmp_path / "clip.avi")
@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from checkpoint import load_checkpoint, save_checkpoint, video_stamp
+
+
+def test_refuses_a_video_changed_since_the_checkpoint(tmp_path, video):
+    ckpt = tmp_path / "clip.jsonl.ckpt"
+    save_checkpoint(ckpt, {"video": video_stamp(video), "settings": None, "next_frame": 10})
+    assert load_checkpoint(ckpt, video)["next_frame"] == 10
+
+    # Same size, rewritten later
+    stat = os.stat(video)
+    os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with pytest.raises(ValueError, match="changed"):
+        load_checkpoint(ckpt, video)
@@ -0,0 +1,8 @@
+from metrics import Metrics
+
+
+def test_prometheus_escapes_label_values():
+    text = Metrics(labels={"video": 'a\\b"c\nd.mov'}).to_prometheus()
+    assert 'track_wall_seconds{video="a\\\\b\\"c\\nd.mov"}' in text
+    # Every sample stays on one line
+    assert all(line.startswith(("#", "track_")) for line in text.splitlines() if line)
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from ultralytics.trackers.basetrack import BaseTrack
+
+import track_video as tv
+from conftest import FakeModel
+from track_format import read_jsonl
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    monkeypatch.setattr(tv, "_init_worker", lambda *args, **kwargs: None)
+    monkeypatch.setattr(tv, "_get_model", lambda *args, **kwargs: FakeModel())
+
+
+@pytest.mark.parametrize("no_cache", [True, False])
+def test_single_worker_continues_past_a_bad_input(tmp_path, video, fake_model, monkeypatch, capsys, no_cache):
+    missing = tmp_path / "missing.avi"
+    argv = ["track_video.py", str(missing), str(video), "--workers", "1",
+            "--out-dir", str(tmp_path / "out"), "--cache-dir", str(tmp_path / "cache")]
+    if no_cache:
+        argv.append("--no-cache")
+    monkeypatch.setattr("sys.argv", argv)
+
+    assert tv.main() == 1
+    assert f"Error: {missing}" in capsys.readouterr().err
+    out = json.loads((tmp_path / "out" / "clip_tracks.json").read_text())
+    assert len(out["frames"]) == 60
+
+
+class CrashingDecoder:
+    """Wraps a decoder and raises once it has handed out crash_after frames."""
+
+    def __init__(self, video, crash_after):
+        self.video = video
+        self.left = crash_after
+
+    def read(self):
+        if self.left == 0:
+            raise RuntimeError("simulated crash")
+        self.left -= 1
+        return self.video.read()
+
+    def __getattr__(self, name):
+        return getattr(self.video, name)
+
+
+def _track(video, out, **kwargs):
+    return tv.track_video(FakeModel(), video, out, fmt="jsonl", batch_size=4, pipelined=False,
+                          checkpoint_every=10, **kwargs)
+
+
+@pytest.mark.parametrize("motion_threshold", [None, 4.0])
+def test_stride_resume_matches_uninterrupted_run(tmp_path, video, monkeypatch, motion_threshold):
+    BaseTrack._count = 0
+    _track(video, tmp_path / "full.jsonl", stride=3, motion_threshold=motion_threshold)
+
+    BaseTrack._count = 0
+    open_decoder = tv.open_decoder
+    monkeypatch.setattr(tv, "open_decoder", lambda *args: CrashingDecoder(open_decoder(*args), 47))
+    with pytest.raises(RuntimeError, match="simulated crash"):
+        _track(video, tmp_path / "resumed.jsonl", stride=3, motion_threshold=motion_threshold)
+    monkeypatch.setattr(tv, "open_decoder", open_decoder)
+    stats = _track(video, tmp_path / "resumed.jsonl", stride=3, motion_threshold=motion_threshold, resume=True)
+
+    assert stats["resumed_from"] > 0
+    assert read_jsonl(tmp_path / "resumed.jsonl") == read_jsonl(tmp_path / "full.jsonl")
@@ -0,0 +1,109 @@
+# track_cache.py
+"""Content-addressed on-disk cache for track_video results.
+
+A result is keyed by the SHA-256 of the video's bytes plus every setting
+that changes the output (model, tracker config contents, conf, iou,
+classes, format, stride, ROI, ...). Renaming or copying a clip still hits;
+touching a single byte of it or of the tracker config misses.
+
+Each entry is a directory <root>/<key[:2]>/<key>/ holding the track file,
+the index if one was built, and the run's stats. Hits bump the directory's
+mtime, and the least recently used entries are evicted once the cache
+grows past its size cap.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("TRACK_CACHE_DIR", Path.home() / ".cache" / "project-ph" / "tracks"))
+CACHE_MAX_MB = 2048
+
+# Bump when a code change alters output for the same settings
+CACHE_VERSION = 1
+
+_TRACKS = "tracks"
+_INDEX = "index.json"
+_STATS = "stats.json"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(video_path, settings):
+    """Key for a video and a JSON-serializable dict of output-affecting settings."""
+    material = {"version": CACHE_VERSION, "video": file_digest(video_path), "settings": settings}
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class TrackCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _entry(self, key):
+        return self.root / key[:2] / key
+
+    def fetch(self, key, out_path, index_path=None):
+        """Copies a cached result to out_path (and index_path).
+
+        Returns the stats stored with it, or None on a miss.
+        """
+        entry = self._entry(key)
+        tracks = next(entry.glob(f"{_TRACKS}.*"), None) if entry.is_dir() else None
+        if tracks is None or (index_path and not (entry / _INDEX).exists()):
+            return None
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(tracks, out_path)
+        if index_path:
+            shutil.copyfile(entry / _INDEX, index_path)
+        stats_path = entry / _STATS
+        stats = json.loads(stats_path.read_text()) if stats_path.exists() else {}
+        # Mark as recently used for eviction
+        os.utime(entry)
+        return stats
+
+    def store(self, key, out_path, index_path=None, stats=None):
+        """Adds a finished result to the cache, then evicts down to the size cap."""
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Build in a temp dir and rename, so readers never see half an entry
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".tmp-"))
+        try:
+            shutil.copyfile(out_path, tmp / f"{_TRACKS}{Path(out_path).suffix}")
+            if index_path:
+                shutil.copyfile(index_path, tmp / _INDEX)
+            (tmp / _STATS).write_text(json.dumps(stats or {}))
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(tmp, entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        """(mtime, bytes, path) for every entry, oldest first."""
+        found = []
+        for entry in self.root.glob("??/*"):
+            if not entry.is_dir() or entry.name.startswith(".tmp-"):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            found.append((entry.stat().st_mtime, size, entry))
+        return sorted(found)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
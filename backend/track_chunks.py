@@ -0,0 +1,280 @@
+# track_chunks.py
+"""Chunked parallel tracking for a single long video.
+
+ByteTrack is sequential, so one video normally runs on one core. Here the
+video is cut into time chunks that are tracked independently in a process
+pool. Each chunk starts `overlap` frames early to warm up its tracker, and
+those warm-up frames are matched by IoU against the previous chunk's output
+for the same frames to carry track ids across the boundary:
+
+    chunk 0   [0 ............ e0)
+    chunk 1          [e0-ov .. e0 ............ e1)
+                      ^ warm-up, matched against chunk 0, then dropped
+
+Ids with no match in the overlap get fresh ids, so the output has one
+consistent id space.
+"""
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import track_video as tv
+from decoders import DECODER, THREADS, open_decoder
+from track_format import open_writer
+from track_index import TrackIndexBuilder, index_path_for
+from track_stride import DetectGate, GapFiller
+
+CHUNK_SECONDS = 60.0
+OVERLAP_SECONDS = 2.0
+
+# Minimum mean IoU over the overlap for two fragments to be the same track
+STITCH_MIN_IOU = 0.5
+# ...and the minimum number of overlap frames they must share
+STITCH_MIN_FRAMES = 3
+
+
+def plan_chunks(num_frames, chunk_frames, overlap):
+    """Splits [0, num_frames) into (read_start, out_start, end) triples.
+
+    A chunk reads [read_start, end) and owns the output for [out_start, end).
+    The last chunk's end is None, meaning "until end of stream", since
+    container frame counts are not always exact.
+    """
+    if overlap >= chunk_frames:
+        raise ValueError("overlap must be shorter than a chunk")
+    chunks = []
+    out_start = 0
+    while True:
+        end = out_start + chunk_frames
+        if end >= num_frames:
+            chunks.append((max(0, out_start - overlap), out_start, None))
+            return chunks
+        chunks.append((max(0, out_start - overlap), out_start, end))
+        out_start = end
+
+
+def _track_chunk(job):
+    """Worker: tracks one chunk and returns its frame dicts (warm-up included).
+
+    The detected-frame count excludes the warm-up, which stitch() drops.
+    """
+    video_path, (read_start, out_start, end), options = job
+    stride = options.get("stride", 1)
+    motion_threshold = options.get("motion_threshold")
+    # Already resolved to a tuple (or None) by track_video_chunked
+    roi = options.get("roi")
+    offset = roi[:2] if roi else (0, 0)
+
+    video = open_decoder(video_path, options.get("decoder", DECODER), options.get("decode_threads", THREADS))
+    fps = video.fps
+    if read_start:
+        video.seek(read_start)
+
+    tracker = tv.load_tracker(stride)
+    gate = DetectGate(stride, motion_threshold) if stride > 1 or motion_threshold is not None else None
+    count = None if end is None else end - read_start
+
+    frames_out = []
+    detected = 0
+    filler = GapFiller(frames_out.append)
+    frames = tv.read_frames(video, count, roi)
+    if options.get("pipelined", tv.PIPELINED):
+        frames = tv.prefetch(frames, maxsize=tv.QUEUE_SIZE)
+    batch_size = options.get("batch_size", tv.BATCH_SIZE)
+    try:
+        rows_iter = tv.track_batches(
+            tv._get_model(batch_size, options.get("imgsz")), tracker, frames,
+            batch_size, gate, options.get("imgsz"),
+        )
+        for i, rows in enumerate(rows_iter):
+            frame_idx = read_start + i
+            # None marks a frame the gate skipped
+            if rows is not None and frame_idx >= out_start:
+                detected += 1
+            filler.push({
+                "frame": frame_idx,
+                "t": frame_idx / fps,
+                "tracks": tv.rows_to_tracks(rows, offset),
+            })
+    finally:
+        frames.close()
+        video.close()
+    filler.flush()
+    return frames_out, detected
+
+
+def _iou(a, b):
+    # a: (N, 4), b: (M, 4) xyxy -> (N, M)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1), 0.0)
+
+
+def match_overlap(prev_frames, cur_frames, min_iou=STITCH_MIN_IOU, min_frames=STITCH_MIN_FRAMES):
+    """Matches current-chunk ids to previous-chunk ids over aligned overlap frames.
+
+    Returns {current id: previous id}. Pairs are scored by mean IoU over the
+    frames where both are present and assigned greedily, best first.
+    """
+    iou_sum = defaultdict(float)
+    shared = defaultdict(int)
+    for pf, cf in zip(prev_frames, cur_frames):
+        if not pf["tracks"] or not cf["tracks"]:
+            continue
+        ious = _iou(
+            np.array([tr["bbox"] for tr in pf["tracks"]], dtype=float),
+            np.array([tr["bbox"] for tr in cf["tracks"]], dtype=float),
+        )
+        for i, p in enumerate(pf["tracks"]):
+            for j, c in enumerate(cf["tracks"]):
+                key = (p["id"], c["id"])
+                iou_sum[key] += ious[i, j]
+                shared[key] += 1
+
+    need = min(min_frames, len(prev_frames))
+    candidates = sorted(
+        ((iou_sum[k] / shared[k], k) for k in iou_sum if shared[k] >= need),
+        reverse=True,
+    )
+    mapping = {}
+    used_prev = set()
+    for score, (prev_id, cur_id) in candidates:
+        if score < min_iou:
+            break
+        if cur_id in mapping or prev_id in used_prev:
+            continue
+        mapping[cur_id] = prev_id
+        used_prev.add(prev_id)
+    return mapping
+
+
+class Stitcher:
+    """Remaps chunk-local ids into one global id space, chunk by chunk."""
+
+    def __init__(self, overlap):
+        self.overlap = overlap
+        self.next_id = 1
+        # Previous chunk's output frames by frame index, with global ids
+        self.prev_tail = {}
+
+    def _fresh(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def stitch(self, chunk, frames):
+        """Returns the chunk's owned frames [out_start, end) with global ids."""
+        out_start = chunk[1]
+        warmup = [f for f in frames if f["frame"] < out_start]
+        owned = [f for f in frames if f["frame"] >= out_start]
+
+        prev = [self.prev_tail[f["frame"]] for f in warmup if f["frame"] in self.prev_tail]
+        cur = [f for f in warmup if f["frame"] in self.prev_tail]
+        mapping = match_overlap(prev, cur) if prev else {}
+
+        def global_id(local):
+            if local not in mapping:
+                mapping[local] = self._fresh()
+            return mapping[local]
+
+        # Matched ids continue a previous track; the rest get fresh ids
+        for f in owned:
+            for tr in f["tracks"]:
+                tr["id"] = global_id(tr["id"])
+
+        # Keep enough of this chunk to match the next chunk's warm-up against
+        tail = owned[-self.overlap:] if self.overlap else []
+        self.prev_tail = {f["frame"]: f for f in tail}
+        return owned
+
+
+def track_video_chunked(video_path, out_path, model_name=tv.MODEL_NAME, workers=None,
+                        chunk_seconds=CHUNK_SECONDS, overlap_seconds=OVERLAP_SECONDS,
+                        fmt="json", index=False, backend=tv.BACKEND, threads=None, encoding="float",
+                        **options):
+    """Tracks one video across a process pool and writes the stitched result.
+
+    options are passed through to the per-chunk tracker (batch_size,
+    pipelined, stride, motion_threshold). Returns the same stats dict as
+    track_video.track_video().
+    """
+    start = time.perf_counter()
+    with open_decoder(video_path, options.get("decoder", DECODER)) as video:
+        fps = video.fps
+        meta = {
+            "videoW": video.width,
+            "videoH": video.height,
+            "fps": fps,
+        }
+        total = video.frame_count
+    # Resolve "auto" once here rather than differently in every chunk
+    roi = tv.resolve_roi(options.get("roi"), video_path, meta["videoW"], meta["videoH"],
+                         options.get("decoder", DECODER))
+    # Checkpoints, scene cuts and metrics are whole-video state that doesn't apply to chunk workers
+    options = dict(options, roi=roi)
+    options.pop("checkpoint_every", None)
+    options.pop("resume", None)
+    for key in ("scene_cuts", "skip_other_shots", "cut_threshold", "metrics_format", "trace"):
+        options.pop(key, None)
+
+    chunk_frames = max(1, round(chunk_seconds * fps))
+    overlap = min(chunk_frames - 1, round(overlap_seconds * fps))
+    chunks = plan_chunks(total, chunk_frames, overlap)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    writer = open_writer(fmt, out_path, meta, encoding)
+    builder = TrackIndexBuilder(meta) if index else None
+    stitcher = Stitcher(overlap)
+    num_frames = 0
+    detected = 0
+
+    jobs = [(str(video_path), chunk, options) for chunk in chunks]
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=tv._init_worker,
+            initargs=(model_name, threads, backend),
+        ) as pool:
+            # map() yields in chunk order, which stitching needs
+            for chunk, (frames, chunk_detected) in zip(chunks, pool.map(_track_chunk, jobs)):
+                for frame in stitcher.stitch(chunk, frames):
+                    writer.write_frame(frame)
+                    if builder is not None:
+                        builder.add_frame(frame)
+                    num_frames += 1
+                detected += chunk_detected
+    except BaseException:
+        writer.abort()
+        raise
+
+    writer.close()
+    if builder is not None:
+        builder.write(index_path_for(out_path))
+
+    seconds = time.perf_counter() - start
+    return {
+        "video": str(video_path),
+        "out": str(out_path),
+        "index": str(index_path_for(out_path)) if index else None,
+        "roi": roi,
+        "frames": num_frames,
+        "detected": detected,
+        "seconds": seconds,
+        "fps": num_frames / seconds if seconds > 0 else 0.0,
+    }
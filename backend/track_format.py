@@ -0,0 +1,522 @@
+# track_format.py
+"""Readers and writers for track_video output.
+
+Three formats are supported:
+
+json      The original payload: {"videoW", "videoH", "fps", "frames": [...]},
+          each frame {"frame", "t", "tracks": [{"id", "conf", "bbox"}]}.
+          Frames are streamed to disk as they arrive, but the file is only
+          valid JSON once the writer is closed.
+
+          Fields only known at the end of a run are passed to close() and
+          land after "frames": currently "shots", the scene-cut shot list
+          [{"start", "end", "kind", "skipped"}] (see scene_cuts.py).
+
+jsonl     Crash-safe JSON Lines. Line 1 is the header {"videoW", "videoH",
+          "fps"}, then one frame object per line, flushed as it is written.
+          close() appends a footer line {"end": true, "numFrames": n,
+          "index": [[frame, byte offset], ...]} with the offset of every
+          INDEX_STRIDE-th frame line. A file without the footer (the run
+          died) is still readable up to its last complete line. close()
+          fields such as "shots" go in the footer.
+
+columnar  A little-endian binary container (.trk) holding the same data as
+          flat arrays, so readers can map it straight into typed arrays:
+
+            bytes 0-5    magic b"PHTRK\\0"
+            bytes 6-7    uint16 format version (1)
+            bytes 8-11   uint32 header length H
+            bytes 12..   H bytes of UTF-8 JSON header, space padded so the
+                         first column starts on an 8-byte boundary
+            columns      raw arrays, each 8-byte aligned
+
+          The header holds videoW, videoH, fps, numFrames, numRows, any
+          close() fields such as "shots", and a "columns" map of name -> {"dtype", "offset", "shape"}, where offset
+          is absolute from the start of the file. Columns:
+
+            frame_offsets  <u4 (numFrames + 1,)  rows of frame i are
+                                                 [frame_offsets[i], frame_offsets[i+1])
+            t              <f8 (numFrames,)      frame timestamp in seconds
+            frame          <u4 (numRows,)        frame index of each row
+            id             <i4 (numRows,)        track id
+            conf           <f4 (numRows,)        detection confidence
+            bbox           <f4 (numRows, 4)      x1, y1, x2, y2 in pixels
+            flags          |u1 (numRows,)        bit 0: box was interpolated
+                                                 ("interp" in JSON)
+                                                 bit 1: gap filled by the
+                                                 smoother ("filled" in JSON)
+
+          Readers must look columns up by name and ignore unknown ones.
+
+Encodings (open_writer's encoding argument) trade precision nobody can see
+on a screen overlay for size and parse time:
+
+float      Full precision, as above. The default.
+
+quantized  json/jsonl: bboxes rounded to integer pixels and conf to two
+           decimals; same schema, so every reader still works.
+           columnar: bbox is replaced by "bbox_q" <i2 (numRows, 4), fixed
+           point with header "bboxScale" steps per pixel (BBOX_SCALE, so at
+           most 1/(2*BBOX_SCALE) px off), and conf by "conf_q" |u1 in
+           1/255 steps.
+
+delta      columnar only: quantized, and every row of "bbox_q" after a
+           track's first holds the difference from that track's previous
+           row instead (header "bboxDelta": true). Players move a few
+           pixels a frame, so the values are small and compress well.
+
+Quantized files have no "bbox"/"conf" columns, so older readers fail
+loudly instead of misreading them; load_columns() and load_tracks() decode
+them back to floats. See encoding_report.py for size versus error.
+"""
+import json
+import os
+import struct
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+FORMATS = ("json", "jsonl", "columnar")
+SUFFIXES = {"json": ".json", "jsonl": ".jsonl", "columnar": ".trk"}
+
+MAGIC = b"PHTRK\0"
+VERSION = 1
+_PREFIX = struct.Struct("<6sHI")
+_ALIGN = 8
+
+# Optional top-level fields carried through every format
+EXTRA_KEYS = ("shots",)
+
+ENCODINGS = ("float", "quantized", "delta")
+# Fixed-point steps per pixel for quantized columnar bboxes; int16 then
+# covers frames up to 8191 px, and bigger ones fall back to whole pixels
+BBOX_SCALE = 4
+CONF_SCALE = 255
+
+# Bits of the columnar "flags" column
+FLAG_INTERP = 1
+FLAG_FILLED = 2
+# JSON track keys for each flag bit
+FLAG_KEYS = {"interp": FLAG_INTERP, "filled": FLAG_FILLED}
+
+# Frames between entries of the jsonl footer index
+INDEX_STRIDE = 100
+# Frames between explicit flushes of the jsonl writer
+FLUSH_EVERY = 1
+
+
+def _pad(n):
+    return -n % _ALIGN
+
+
+class JsonTrackWriter:
+    """Streams the classic JSON payload to disk one frame at a time.
+
+    Output is byte-identical to json.dumps(dict(meta, frames=frames)), but
+    frames are never held in memory. Frames go to <path>.tmp, which close()
+    moves into place, so a failed run leaves any previous file untouched.
+    """
+
+    def __init__(self, path, meta, encoding="float"):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.encoding = _check_json_encoding(encoding)
+        self.f = open(self.tmp_path, "w", encoding="utf-8")
+        # '{"videoW": ..., "fps": ...' + ', "frames": ['
+        self.f.write(json.dumps(meta)[:-1] + ', "frames": [')
+        self.first = True
+
+    def write_frame(self, frame):
+        if not self.first:
+            self.f.write(", ")
+        self.first = False
+        self.f.write(json.dumps(quantize_frame(frame) if self.encoding == "quantized" else frame))
+
+    def close(self, extra=None):
+        # extra: top-level fields only known at the end of the run
+        self.f.write("]" + (", " + json.dumps(extra)[1:-1] if extra else "") + "}")
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.f.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class JsonlTrackWriter:
+    """Writes one JSON line per frame, flushing so a crash loses at most one frame."""
+
+    def __init__(self, path, meta, flush_every=FLUSH_EVERY, fsync=False, encoding="float"):
+        self.path = Path(path)
+        self.encoding = _check_json_encoding(encoding)
+        self.flush_every = flush_every
+        self.fsync = fsync
+        # Binary mode so tell() is a plain byte offset for the index
+        self.f = open(self.path, "wb")
+        self.num_frames = 0
+        self.index = []
+        self._write_line(meta)
+        self.flush()
+
+    @classmethod
+    def resume(cls, path, state, flush_every=FLUSH_EVERY, fsync=False):
+        """Reopens a partial file at a state() snapshot, dropping anything after it."""
+        self = cls.__new__(cls)
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.f = open(self.path, "r+b")
+        self.f.truncate(state["offset"])
+        self.f.seek(state["offset"])
+        self.encoding = state.get("encoding", "float")
+        self.num_frames = state["num_frames"]
+        self.index = [list(entry) for entry in state["index"]]
+        return self
+
+    def state(self):
+        """Flushes and returns what resume() needs to continue from here."""
+        self.flush()
+        return {
+            "offset": self.f.tell(),
+            "num_frames": self.num_frames,
+            "index": list(self.index),
+            "encoding": self.encoding,
+        }
+
+    def _write_line(self, obj):
+        self.f.write(json.dumps(obj).encode("utf-8") + b"\n")
+
+    def flush(self):
+        self.f.flush()
+        if self.fsync:
+            os.fsync(self.f.fileno())
+
+    def write_frame(self, frame):
+        if self.num_frames % INDEX_STRIDE == 0:
+            self.index.append([frame["frame"], self.f.tell()])
+        self._write_line(quantize_frame(frame) if self.encoding == "quantized" else frame)
+        self.num_frames += 1
+        if self.num_frames % self.flush_every == 0:
+            self.flush()
+
+    def close(self, extra=None):
+        self._write_line(dict(extra or {}, end=True, numFrames=self.num_frames, index=self.index))
+        self.flush()
+        self.f.close()
+
+    def abort(self):
+        # Leave the file without a footer; readers treat it as partial
+        self.flush()
+        self.f.close()
+
+
+class ColumnarTrackWriter:
+    """Accumulates frames into flat columns and writes a .trk file on close()."""
+
+    def __init__(self, path, meta, encoding="float"):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}; expected one of {', '.join(ENCODINGS)}")
+        self.path = path
+        self.meta = meta
+        self.encoding = encoding
+        # array.array appends are cheap and avoid a numpy call per frame
+        self.frame_offsets = array("I", [0])
+        self.t = array("d")
+        self.frame = array("I")
+        self.ids = array("i")
+        self.conf = array("f")
+        self.bbox = array("f")
+        self.flags = array("B")
+
+    def write_frame(self, frame):
+        self.t.append(frame["t"])
+        for track in frame["tracks"]:
+            self.frame.append(frame["frame"])
+            self.ids.append(track["id"])
+            self.conf.append(track["conf"])
+            self.bbox.extend(track["bbox"])
+            self.flags.append(sum(bit for key, bit in FLAG_KEYS.items() if track.get(key)))
+        self.frame_offsets.append(len(self.ids))
+
+    def columns(self):
+        return {
+            "frame_offsets": np.frombuffer(self.frame_offsets, dtype="<u4"),
+            "t": np.frombuffer(self.t, dtype="<f8"),
+            "frame": np.frombuffer(self.frame, dtype="<u4"),
+            "id": np.frombuffer(self.ids, dtype="<i4"),
+            "conf": np.frombuffer(self.conf, dtype="<f4"),
+            "bbox": np.frombuffer(self.bbox, dtype="<f4").reshape(-1, 4),
+            "flags": np.frombuffer(self.flags, dtype="u1"),
+        }
+
+    def close(self, extra=None):
+        meta, columns = encode_columns(dict(self.meta, **(extra or {})), self.columns(), self.encoding)
+        write_columnar(self.path, meta, columns)
+
+    def abort(self):
+        pass
+
+
+WRITERS = {"json": JsonTrackWriter, "jsonl": JsonlTrackWriter, "columnar": ColumnarTrackWriter}
+
+
+def open_writer(fmt, path, meta, encoding="float"):
+    """Returns a writer for the given format and encoding.
+
+    Writers have write_frame(frame), close(extra=None) to finalize the file
+    (extra holds fields such as "shots" that are only known at the end) and
+    abort() to stop without finalizing.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return WRITERS[fmt](path, meta, encoding=encoding)
+
+
+def _check_json_encoding(encoding):
+    if encoding not in ("float", "quantized"):
+        raise ValueError(f"Encoding {encoding!r} is only supported by the columnar format")
+    return encoding
+
+
+def quantize_frame(frame):
+    """Frame dict with integer-pixel bboxes and two-decimal conf."""
+    if not frame["tracks"]:
+        return frame
+    return dict(frame, tracks=[
+        dict(track, bbox=[round(v) for v in track["bbox"]], conf=round(track["conf"], 2))
+        for track in frame["tracks"]
+    ])
+
+
+def _track_order(ids):
+    # Rows grouped by track id, each group in file (= frame) order
+    order = np.lexsort((np.arange(len(ids)), ids))
+    sorted_ids = ids[order]
+    first = np.ones(len(ids), bool)
+    first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+    return order, first
+
+
+def encode_columns(meta, columns, encoding):
+    """Applies an encoding to float columns; returns (meta, columns) to write."""
+    if encoding == "float":
+        return meta, columns
+    size = max(meta.get("videoW") or 0, meta.get("videoH") or 0)
+    scale = BBOX_SCALE if size * BBOX_SCALE < 32000 else 1
+    q = np.round(np.asarray(columns["bbox"], np.float64) * scale).astype(np.int32)
+    if encoding == "delta":
+        order, first = _track_order(columns["id"])
+        grouped = q[order]
+        diff = grouped.copy()
+        diff[1:] -= grouped[:-1]
+        diff[first] = grouped[first]
+        q = np.empty_like(diff)
+        q[order] = diff
+    if q.size and (q.min() < -32768 or q.max() > 32767):
+        raise ValueError("bbox values don't fit the int16 quantized encoding")
+
+    out = {name: col for name, col in columns.items() if name not in ("bbox", "conf")}
+    out["bbox_q"] = q.astype("<i2")
+    out["conf_q"] = np.round(np.clip(columns["conf"], 0, 1) * CONF_SCALE).astype("u1")
+    return dict(meta, bboxScale=scale, bboxDelta=encoding == "delta"), out
+
+
+def decode_columns(header, columns):
+    """Turns quantized/delta columns back into float bbox and conf columns."""
+    if "bbox_q" not in columns:
+        return columns
+    q = columns["bbox_q"].astype(np.int32)
+    if header.get("bboxDelta"):
+        # Running sum within each track
+        order, first = _track_order(columns["id"])
+        grouped = np.cumsum(q[order], axis=0)
+        start = np.maximum.accumulate(np.where(first, np.arange(len(first)), 0))
+        base = grouped[start] - q[order][start]
+        q = np.empty_like(grouped)
+        q[order] = grouped - base
+    out = {name: col for name, col in columns.items() if name not in ("bbox_q", "conf_q")}
+    out["bbox"] = (q / header["bboxScale"]).astype("<f4")
+    out["conf"] = (columns["conf_q"] / CONF_SCALE).astype("<f4")
+    return out
+
+
+def write_columnar(path, meta, columns):
+    """Writes a .trk container with the given header fields and numpy columns."""
+    columns = {name: np.ascontiguousarray(col) for name, col in columns.items()}
+    num_frames = len(columns["t"])
+    num_rows = len(columns["id"])
+
+    def build_header(data_start):
+        spec = {}
+        offset = data_start
+        for name, col in columns.items():
+            spec[name] = {
+                "dtype": col.dtype.newbyteorder("<").str,
+                "offset": offset,
+                "shape": list(col.shape),
+            }
+            offset += col.nbytes + _pad(col.nbytes)
+        header = dict(meta, numFrames=num_frames, numRows=num_rows, columns=spec)
+        return json.dumps(header).encode("utf-8")
+
+    # Column offsets live in the header, so size it until it stops moving
+    data_start = 0
+    while True:
+        header = build_header(data_start)
+        needed = _PREFIX.size + len(header)
+        needed += _pad(needed)
+        if needed == data_start:
+            break
+        data_start = needed
+    header += b" " * (data_start - _PREFIX.size - len(header))
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for col in columns.values():
+            f.write(col.astype(col.dtype.newbyteorder("<"), copy=False).tobytes())
+            f.write(b"\0" * _pad(col.nbytes))
+
+
+def read_columnar(path):
+    """Reads a .trk file into (header, {name: numpy array}).
+
+    Arrays are read-only views over the file contents, not copies.
+    """
+    data = Path(path).read_bytes()
+    magic, version, header_len = _PREFIX.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a columnar track file")
+    if version > VERSION:
+        raise ValueError(f"{path} uses format version {version}; this reader supports {VERSION}")
+
+    header = json.loads(data[_PREFIX.size:_PREFIX.size + header_len])
+    columns = {}
+    for name, spec in header.pop("columns").items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=spec["offset"]).reshape(shape)
+    return header, columns
+
+
+def frames_to_columns(frames):
+    """Converts a list of JSON frame dicts into the columnar arrays."""
+    writer = ColumnarTrackWriter(None, {})
+    for frame in frames:
+        writer.write_frame(frame)
+    return writer.columns()
+
+
+def columns_to_frames(columns):
+    """Converts columnar arrays back into a list of JSON frame dicts."""
+    offsets = columns["frame_offsets"].tolist()
+    ids = columns["id"].tolist()
+    conf = columns["conf"].tolist()
+    bbox = columns["bbox"].tolist()
+    flags = columns["flags"].tolist() if "flags" in columns else None
+    frames = []
+    for i, t in enumerate(columns["t"].tolist()):
+        tracks = []
+        for j in range(offsets[i], offsets[i + 1]):
+            track = {"id": ids[j], "conf": conf[j], "bbox": bbox[j]}
+            if flags is not None and flags[j]:
+                for key, bit in FLAG_KEYS.items():
+                    if flags[j] & bit:
+                        track[key] = True
+            tracks.append(track)
+        frames.append({"frame": i, "t": t, "tracks": tracks})
+    return frames
+
+
+def iter_jsonl(path):
+    """Opens a jsonl track file for streaming.
+
+    Returns (header, frames, footer): frames is an iterator of frame dicts and
+    footer is a dict filled in once iteration reaches the footer line. It
+    stays empty for a partial file. Use read_jsonl() unless you need to stream.
+    """
+    f = open(path, "rb")
+    header = json.loads(f.readline())
+    footer = {}
+
+    def frames():
+        with f:
+            for line in f:
+                # A line without its newline is a write cut short by a crash
+                if not line.endswith(b"\n"):
+                    break
+                obj = json.loads(line)
+                if obj.get("end"):
+                    footer.update(obj)
+                    break
+                yield obj
+
+    return header, frames(), footer
+
+
+def read_jsonl(path):
+    """Reads a jsonl track file, complete or partial.
+
+    Returns (payload, complete) where payload is the classic JSON dict.
+    """
+    header, frames, footer = iter_jsonl(path)
+    payload = dict(header, frames=list(frames))
+    payload.update({k: footer[k] for k in EXTRA_KEYS if k in footer})
+    return payload, bool(footer)
+
+
+def load_tracks(path):
+    """Loads any format and returns the classic JSON payload dict."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        is_columnar = f.read(len(MAGIC)) == MAGIC
+        f.seek(0)
+        first_line = f.readline()
+    if not is_columnar:
+        first = json.loads(first_line)
+        if "frames" in first:
+            return first
+        return read_jsonl(path)[0]
+
+    header, columns = read_columnar(path)
+    return dict(_meta(header), frames=columns_to_frames(decode_columns(header, columns)))
+
+
+def _meta(payload):
+    meta = {k: payload[k] for k in ("videoW", "videoH", "fps")}
+    meta.update({k: payload[k] for k in EXTRA_KEYS if k in payload})
+    return meta
+
+
+def load_columns(path):
+    """Loads any format as (meta, columns), skipping the dict round trip for .trk."""
+    with open(path, "rb") as f:
+        is_columnar = f.read(len(MAGIC)) == MAGIC
+    if is_columnar:
+        header, columns = read_columnar(path)
+        return _meta(header), decode_columns(header, columns)
+    payload = load_tracks(path)
+    return _meta(payload), frames_to_columns(payload["frames"])
+
+
+def format_for_path(path):
+    """Guesses the output format from a file suffix, defaulting to json."""
+    suffix = Path(path).suffix
+    for fmt, fmt_suffix in SUFFIXES.items():
+        if suffix == fmt_suffix:
+            return fmt
+    return "json"
+
+
+def save_columns(path, meta, columns, fmt=None, encoding="float"):
+    """Writes columnar arrays to path in any format (guessed from the suffix by default)."""
+    fmt = fmt or format_for_path(path)
+    if fmt == "columnar":
+        write_columnar(path, *encode_columns(meta, columns, encoding))
+        return
+    writer = open_writer(fmt, path, meta, encoding)
+    for frame in columns_to_frames(columns):
+        writer.write_frame(frame)
+    writer.close()
@@ -0,0 +1,222 @@
+# track_index.py
+"""Track-centric index over track_video output.
+
+The per-frame payload answers "what is on screen at frame N"; the index
+answers "where is track K at time t". For every track id it stores the
+sorted sample times and frames, the bbox and center series, and the first
+and last frame, so lookups are a binary search instead of a scan:
+
+    {
+      "videoW": 1280, "videoH": 720, "fps": 25.0,
+      "tracks": {
+        "2": {"first": 0, "last": 245, "firstT": 0.0, "lastT": 9.78,
+              "frames": [...], "t": [...], "center": [[cx, cy], ...],
+              "bbox": [[x1, y1, x2, y2], ...]},
+        ...
+      }
+    }
+
+Usage:
+    python track_index.py ../public/bruno_tracks.json
+    python track_index.py ../public/bruno_tracks.json --bench 100000
+"""
+import argparse
+import json
+import random
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from track_format import load_tracks
+
+
+class TrackIndexBuilder:
+    """Builds the index one frame at a time, in frame order."""
+
+    def __init__(self, meta):
+        self.meta = {k: meta[k] for k in ("videoW", "videoH", "fps")}
+        self.tracks = {}
+
+    def add_frame(self, frame):
+        for track in frame["tracks"]:
+            entry = self.tracks.get(track["id"])
+            if entry is None:
+                entry = self.tracks[track["id"]] = {"frames": [], "t": [], "center": [], "bbox": []}
+            x1, y1, x2, y2 = track["bbox"]
+            entry["frames"].append(frame["frame"])
+            entry["t"].append(frame["t"])
+            entry["center"].append([(x1 + x2) / 2, (y1 + y2) / 2])
+            entry["bbox"].append(track["bbox"])
+
+    def to_dict(self):
+        tracks = {}
+        for track_id in sorted(self.tracks):
+            entry = self.tracks[track_id]
+            tracks[str(track_id)] = dict(
+                first=entry["frames"][0],
+                last=entry["frames"][-1],
+                firstT=entry["t"][0],
+                lastT=entry["t"][-1],
+                **entry,
+            )
+        return dict(self.meta, tracks=tracks)
+
+    def write(self, path):
+        Path(path).write_text(json.dumps(self.to_dict()))
+
+
+def build_index(payload):
+    """Builds the index dict from a classic JSON payload."""
+    builder = TrackIndexBuilder(payload)
+    for frame in payload["frames"]:
+        builder.add_frame(frame)
+    return builder.to_dict()
+
+
+def index_path_for(out_path):
+    # ../public/bruno_tracks.json -> ../public/bruno_tracks_index.json
+    out_path = Path(out_path)
+    return out_path.with_name(f"{out_path.stem}_index.json")
+
+
+class TrackIndex:
+    """Query API over an index dict (see build_index / TrackIndexBuilder)."""
+
+    def __init__(self, index):
+        self.fps = index["fps"]
+        self.tracks = {int(k): v for k, v in index["tracks"].items()}
+        # Tracks sorted by start time, for active_tracks()
+        order = sorted(self.tracks, key=lambda k: self.tracks[k]["firstT"])
+        self._starts = [self.tracks[k]["firstT"] for k in order]
+        self._by_start = order
+
+    @classmethod
+    def load(cls, path):
+        return cls(json.loads(Path(path).read_text()))
+
+    def _locate(self, track_id, t):
+        # Returns (track, i, a): sample t lies between samples i and i+1 at fraction a
+        track = self.tracks.get(track_id)
+        if track is None or not track["firstT"] <= t <= track["lastT"]:
+            return None
+        times = track["t"]
+        i = bisect_right(times, t) - 1
+        if i >= len(times) - 1:
+            return track, len(times) - 1, 0.0
+        span = times[i + 1] - times[i]
+        return track, i, (t - times[i]) / span if span > 0 else 0.0
+
+    def position_at(self, track_id, t, interpolate=True):
+        """Center (x, y) of a track at time t, or None outside its active range.
+
+        Between samples the center is linearly interpolated unless
+        interpolate is False, in which case the last sample at or before t
+        is returned.
+        """
+        hit = self._locate(track_id, t)
+        if hit is None:
+            return None
+        track, i, a = hit
+        x, y = track["center"][i]
+        if not interpolate or a == 0.0:
+            return x, y
+        nx, ny = track["center"][i + 1]
+        return x + a * (nx - x), y + a * (ny - y)
+
+    def bbox_at(self, track_id, t, interpolate=True):
+        """Bbox [x1, y1, x2, y2] of a track at time t, or None outside its active range."""
+        hit = self._locate(track_id, t)
+        if hit is None:
+            return None
+        track, i, a = hit
+        box = track["bbox"][i]
+        if not interpolate or a == 0.0:
+            return list(box)
+        nxt = track["bbox"][i + 1]
+        return [v + a * (n - v) for v, n in zip(box, nxt)]
+
+    def active_range(self, track_id):
+        """(first frame, last frame) of a track, or None if unknown."""
+        track = self.tracks.get(track_id)
+        return (track["first"], track["last"]) if track else None
+
+    def active_tracks(self, t0, t1):
+        """Ids of tracks whose active range overlaps [t0, t1], sorted."""
+        # Only tracks starting by t1 can overlap; of those, keep ones still alive at t0
+        end = bisect_right(self._starts, t1)
+        return sorted(k for k in self._by_start[:end] if self.tracks[k]["lastT"] >= t0)
+
+    def samples_between(self, track_id, t0, t1):
+        """Slice (frames, centers) of a track's samples with t0 <= t <= t1."""
+        track = self.tracks.get(track_id)
+        if track is None:
+            return [], []
+        lo = bisect_left(track["t"], t0)
+        hi = bisect_right(track["t"], t1)
+        return track["frames"][lo:hi], track["center"][lo:hi]
+
+
+def _linear_position(payload, track_id, t):
+    # What usePlayerTracking does today: scan frames, then scan the frame's tracks
+    frame = None
+    for f in payload["frames"]:
+        if f["t"] <= t:
+            frame = f
+        else:
+            break
+    if frame is None:
+        return None
+    for track in frame["tracks"]:
+        if track["id"] == track_id:
+            x1, y1, x2, y2 = track["bbox"]
+            return (x1 + x2) / 2, (y1 + y2) / 2
+    return None
+
+
+def bench(payload, index, queries):
+    """Times random position_at() lookups against a linear frame scan."""
+    duration = payload["frames"][-1]["t"] if payload["frames"] else 0.0
+    ids = list(index.tracks)
+    rng = random.Random(0)
+    probes = [(rng.choice(ids), rng.uniform(0, duration)) for _ in range(queries)]
+
+    start = time.perf_counter()
+    for track_id, t in probes:
+        index.position_at(track_id, t, interpolate=False)
+    indexed = time.perf_counter() - start
+
+    # The scan is far slower; a slice of the probes is enough to time it
+    scan_probes = probes[:max(1, queries // 100)]
+    start = time.perf_counter()
+    for track_id, t in scan_probes:
+        _linear_position(payload, track_id, t)
+    scan = (time.perf_counter() - start) * len(probes) / len(scan_probes)
+
+    return {
+        "queries": queries,
+        "tracks": len(ids),
+        "frames": len(payload["frames"]),
+        "index_us_per_query": indexed / queries * 1e6,
+        "scan_us_per_query": scan / queries * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a track-centric index from track_video output")
+    parser.add_argument("tracks", help="Track file in any track_video format")
+    parser.add_argument("-o", "--out", help="Index path (default: <tracks stem>_index.json)")
+    parser.add_argument("--bench", type=int, metavar="N", help="Also time N random position_at() lookups")
+    args = parser.parse_args()
+
+    payload = load_tracks(args.tracks)
+    index = build_index(payload)
+    out = args.out or index_path_for(args.tracks)
+    Path(out).write_text(json.dumps(index))
+    print(f"Wrote {out} with {len(index['tracks'])} tracks")
+
+    if args.bench:
+        print(json.dumps(bench(payload, TrackIndex(index), args.bench), indent=2))
+
+
+if __name__ == "__main__":
+    main()
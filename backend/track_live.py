@@ -0,0 +1,394 @@
+# track_live.py
+"""Live tracking: track frames as they arrive and push them to clients.
+
+The source is anything the decoder (decoders.py) can open as it arrives: a stream URL
+(rtsp://, udp://, http://...), a named pipe, or a file that is still being
+written (--follow). For local testing, --realtime plays a finished file at
+its native frame rate as a stand-in for a camera feed.
+
+Latency is bounded by never queueing frames: the reader thread keeps only
+the newest frame in a one-slot buffer and the tracker always takes the
+latest one, so when detection is slower than the source, frames are dropped
+instead of piling up. Frames older than --max-latency-ms by the time the
+tracker gets to them are dropped too.
+
+Each tracked frame is pushed as a Server-Sent Event on
+
+    GET http://<host>:<port>/events     text/event-stream, one "frame" event per frame
+    GET http://<host>:<port>/latest     the most recent frame as JSON
+
+Slow clients never hold up the tracker: every client has a small bounded
+queue and loses its oldest events when it falls behind.
+
+Usage:
+    python track_live.py ../src/assets/bruno.mov --realtime --loop
+    python track_live.py rtsp://camera.local/stream --port 8765 --out live.jsonl
+    python track_live.py recording.mp4 --follow
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import track_video as tv
+from decoders import DECODER, DECODERS, open_decoder
+from inference import BACKEND, BACKENDS, load_model
+from roi import clamp_roi, crop, parse_roi, pitch_roi
+from track_format import open_writer
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Frames that waited longer than this between capture and detection are dropped
+MAX_LATENCY_MS = 500
+
+# Events buffered per SSE client before its oldest ones are dropped
+CLIENT_QUEUE = 16
+
+# SSE comment sent when there's nothing else to send, so proxies keep the
+# connection open and dead clients are noticed
+KEEPALIVE_SECONDS = 15
+
+# --follow: how often to look for new data, and how long to wait for it
+# before deciding the file is finished
+FOLLOW_POLL_SECONDS = 0.2
+FOLLOW_IDLE_SECONDS = 10
+
+# Print a status line this often
+STATUS_SECONDS = 5
+
+
+def read_source(source, follow=False, realtime=False, loop=False, decoder=DECODER, on_open=None):
+    """Yields (frame_idx, frame) from a file, pipe or stream URL.
+
+    follow keeps reading a file that's still being written, realtime paces
+    a file at its own frame rate, and loop restarts it at the end; the last
+    two turn a recording into a stand-in for a live feed. on_open(decoder)
+    is called once the source is open, for its fps and frame size; pipes
+    and streams can't be opened a second time just to ask.
+    """
+    video = open_decoder(source, decoder)
+    if on_open is not None:
+        on_open(video)
+    fps = video.fps or 25.0
+    frame_idx = 0
+    pos = 0
+    start = time.monotonic()
+    idle_since = None
+    try:
+        while True:
+            frame = video.read()
+            if frame is None:
+                if loop:
+                    video.seek(0)
+                    pos = 0
+                    continue
+                if not follow:
+                    return
+                # Decoders don't see data appended after EOF; reopen and seek back
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since > FOLLOW_IDLE_SECONDS:
+                    return
+                time.sleep(FOLLOW_POLL_SECONDS)
+                video.close()
+                video = open_decoder(source, decoder)
+                video.seek(pos)
+                continue
+            idle_since = None
+            pos += 1
+            if realtime:
+                delay = start + frame_idx / fps - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield frame_idx, frame
+            frame_idx += 1
+    finally:
+        video.close()
+
+
+class LatestFrame:
+    """One-slot buffer: put() replaces whatever the consumer hasn't taken yet."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def get(self):
+        """Blocks for the newest item; returns None once closed and empty."""
+        with self._cond:
+            while self._item is None and not self._closed:
+                self._cond.wait()
+            item, self._item = self._item, None
+            return item
+
+
+class Broadcaster:
+    """Fans events out to any number of SSE clients without blocking the publisher."""
+
+    def __init__(self, client_queue=CLIENT_QUEUE):
+        self.client_queue = client_queue
+        self._clients = set()
+        self._lock = threading.Lock()
+        self.meta = None
+        self.latest = None
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.client_queue)
+        with self._lock:
+            self._clients.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._clients.discard(q)
+
+    @property
+    def num_clients(self):
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, event, data):
+        # Serialize once, however many clients there are
+        message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+        if event == "meta":
+            self.meta = message
+        elif event == "frame":
+            self.latest = data
+        with self._lock:
+            clients = list(self._clients)
+        for q in clients:
+            while True:
+                try:
+                    q.put_nowait(message)
+                    break
+                except queue.Full:
+                    # This client is behind: drop its oldest event
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+def make_handler(broadcaster):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _headers(self, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Cache-Control", "no-cache")
+            # The Vite dev server runs on another port
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/latest":
+                self._headers("application/json")
+                self.wfile.write(json.dumps(broadcaster.latest).encode("utf-8"))
+            elif path == "/events":
+                self._stream()
+            else:
+                self.send_error(404)
+
+        def _stream(self):
+            q = broadcaster.subscribe()
+            try:
+                self._headers("text/event-stream")
+                if broadcaster.meta is not None:
+                    self.wfile.write(broadcaster.meta)
+                self.wfile.flush()
+                while True:
+                    try:
+                        message = q.get(timeout=KEEPALIVE_SECONDS)
+                    except queue.Empty:
+                        message = b": keepalive\n\n"
+                    self.wfile.write(message)
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                broadcaster.unsubscribe(q)
+
+    return Handler
+
+
+def serve(broadcaster, host=HOST, port=PORT):
+    """Starts the SSE server on a daemon thread and returns it."""
+    server = ThreadingHTTPServer((host, port), make_handler(broadcaster))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="sse", daemon=True).start()
+    return server
+
+
+def track_live(model, source, broadcaster, follow=False, realtime=False, loop=False,
+               max_latency_ms=MAX_LATENCY_MS, imgsz=tv.IMGSZ, roi=None, out_path=None, decoder=DECODER):
+    """Tracks a live source until it ends, publishing every tracked frame.
+
+    Returns a stats dict with how many frames were read, tracked and dropped.
+    """
+    slot = LatestFrame()
+    stop = threading.Event()
+    reader_error = []
+    stats = {"read": 0, "tracked": 0, "dropped_late": 0}
+    # Filled in by the reader thread, which is the only one to open the source
+    source_info = {}
+    opened = threading.Event()
+
+    def on_open(video):
+        source_info.update(fps=video.fps or 25.0, width=video.width, height=video.height)
+        opened.set()
+
+    def reader():
+        try:
+            for frame_idx, frame in read_source(source, follow, realtime, loop, decoder, on_open):
+                if stop.is_set():
+                    return
+                slot.put((frame_idx, time.monotonic(), frame))
+                stats["read"] += 1
+        except BaseException as e:
+            reader_error.append(e)
+        finally:
+            opened.set()
+            slot.close()
+
+    tracker = tv.load_tracker()
+    writer = None
+    offset = (0, 0)
+    thread = threading.Thread(target=reader, name="live-reader", daemon=True)
+    thread.start()
+    opened.wait()
+    if not source_info:
+        thread.join()
+        raise reader_error[0] if reader_error else RuntimeError(f"Could not open {source}")
+    fps = source_info["fps"]
+    last_status = time.monotonic()
+    try:
+        while True:
+            item = slot.get()
+            if item is None:
+                break
+            frame_idx, captured, frame = item
+            if (time.monotonic() - captured) * 1000 > max_latency_ms:
+                stats["dropped_late"] += 1
+                continue
+
+            if broadcaster.meta is None:
+                # The first frame fixes the stream's geometry and ROI
+                h, w = frame.shape[:2]
+                if roi == "auto":
+                    roi = pitch_roi([frame])
+                roi = clamp_roi(roi, w, h) if roi else None
+                offset = roi[:2] if roi else (0, 0)
+                meta = {"videoW": w, "videoH": h, "fps": fps, "roi": roi}
+                broadcaster.publish("meta", meta)
+                if out_path is not None:
+                    writer = open_writer("jsonl", out_path, meta)
+
+            result = tv.detect_batch(model, [crop(frame, roi) if roi else frame], imgsz)[0]
+            rows = tv.update_tracker(tracker, result)
+            out = {
+                "frame": frame_idx,
+                "t": frame_idx / fps,
+                "tracks": tv.rows_to_tracks(rows, offset),
+            }
+            if writer is not None:
+                writer.write_frame(out)
+            broadcaster.publish("frame", dict(out, latencyMs=round((time.monotonic() - captured) * 1000, 1)))
+            stats["tracked"] += 1
+
+            now = time.monotonic()
+            if now - last_status > STATUS_SECONDS:
+                last_status = now
+                print(f"frame {frame_idx}: tracked {stats['tracked']}, dropped {slot.dropped} behind + "
+                      f"{stats['dropped_late']} late, {broadcaster.num_clients} clients", file=sys.stderr)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        stop.set()
+        thread.join(timeout=1)
+    if writer is not None:
+        writer.close()
+    if reader_error:
+        raise reader_error[0]
+    broadcaster.publish("end", {"frames": stats["read"]})
+    return dict(stats, dropped_behind=slot.dropped)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Track a live video source and stream results over SSE")
+    parser.add_argument("source", help="Stream URL, named pipe or video file")
+    parser.add_argument("--host", default=HOST, help=f"Address to serve on (default: {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"Port to serve on (default: {PORT})")
+    parser.add_argument("--model", default=tv.MODEL_NAME, help=f"YOLO weights (default: {tv.MODEL_NAME})")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND,
+                        help=f"Inference backend (see inference.py) (default: {BACKEND})")
+    parser.add_argument("--threads", type=int, help="Inference threads (default: the backend's own)")
+    parser.add_argument("--follow", action="store_true", help="Keep reading a file that is still being written")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Play a file at its own frame rate, as a stand-in for a live feed")
+    parser.add_argument("--loop", action="store_true", help="Restart a file when it ends")
+    parser.add_argument("--max-latency-ms", type=float, default=MAX_LATENCY_MS,
+                        help=f"Drop frames older than this when the tracker reaches them (default: {MAX_LATENCY_MS})")
+    parser.add_argument("--imgsz", type=int, default=tv.IMGSZ,
+                        help="Inference image size in pixels (default: the model's own)")
+    parser.add_argument("--roi", type=parse_roi,
+                        help="'x1,y1,x2,y2' or 'auto' (from the first frame's pitch green)")
+    parser.add_argument("--decoder", choices=DECODERS, default=DECODER,
+                        help=f"Video decoder backend; see decoders.py (default: {DECODER})")
+    parser.add_argument("--out", help="Also record tracked frames to this .jsonl file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    # Warm up at batch size 1 so the first live frames don't pay for setup
+    model = load_model(args.model, args.backend, args.threads, batch_size=1, imgsz=args.imgsz)
+    broadcaster = Broadcaster()
+    server = serve(broadcaster, args.host, args.port)
+    print(f"Streaming tracks on http://{args.host}:{args.port}/events", file=sys.stderr)
+    try:
+        stats = track_live(
+            model, args.source, broadcaster,
+            follow=args.follow,
+            realtime=args.realtime,
+            loop=args.loop,
+            max_latency_ms=args.max_latency_ms,
+            imgsz=args.imgsz,
+            roi=args.roi,
+            out_path=Path(args.out) if args.out else None,
+            decoder=args.decoder,
+        )
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.shutdown()
+    print(f"Read {stats['read']} frames, tracked {stats['tracked']}, dropped {stats['dropped_behind']} "
+          f"behind and {stats['dropped_late']} late", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# track_reid.py
+"""Offline re-identification pass that merges fragmented track ids.
+
+ByteTrack gives a player a new id whenever it loses them for too long (a
+goalkeeper's dive, an occlusion), so one player ends up as several short
+tracks. This pass:
+
+1. samples up to SAMPLES_PER_TRACK confident boxes per track and crops
+   them from the video in a single sequential pass;
+2. turns the shirt region of each crop into a hue/saturation histogram,
+   for the whole batch of crops at once, and averages them into one
+   L2-normalized embedding per track;
+3. links fragment A -> B when B starts after A ends (no overlap in time),
+   within max_gap, within a plausible running distance, and their
+   embeddings are similar, best pairs first, one successor/predecessor per
+   fragment;
+4. rewrites every fragment in a chain to the chain's first id.
+
+Usage:
+    python track_reid.py ../public/bruno_tracks.json ../src/assets/bruno.mov
+    python track_reid.py tracks.trk clip.mov merged.trk --min-similarity 0.85
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from decoders import DECODER, open_decoder
+from track_format import FLAG_FILLED, FLAG_INTERP, load_columns, save_columns
+
+SAMPLES_PER_TRACK = 8
+# Crops are resized to this (w, h) before histogramming
+CROP_SIZE = (24, 48)
+# Shirt region as fractions of the bbox: (x0, y0, x1, y1)
+TORSO = (0.2, 0.15, 0.8, 0.6)
+HUE_BINS = 16
+SAT_BINS = 4
+
+MAX_GAP_SECONDS = 3.0
+MIN_SIMILARITY = 0.8
+# How far a player can plausibly move during a gap, in bbox heights per second,
+# plus a fixed slack in bbox heights for the box itself jumping around
+MAX_SPEED = 5.0
+SLACK = 1.0
+
+# Jump ahead with a seek instead of decoding when the next crop is this far away
+SEEK_FRAMES = 120
+
+
+def pick_samples(columns, per_track=SAMPLES_PER_TRACK):
+    """Row indices of up to per_track highest-confidence real detections per track."""
+    ids = columns["id"]
+    flags = columns["flags"] if "flags" in columns else np.zeros(len(ids), np.uint8)
+    real = np.flatnonzero((flags & (FLAG_INTERP | FLAG_FILLED)) == 0)
+    # Sort real rows by (id, -conf) and keep the first per_track of each id
+    order = real[np.lexsort((-columns["conf"][real], ids[real]))]
+    sorted_ids = ids[order]
+    first = np.searchsorted(sorted_ids, sorted_ids, side="left")
+    rank = np.arange(len(order)) - first
+    return order[rank < per_track]
+
+
+def read_crops(video_path, columns, rows, decoder=DECODER):
+    """Crops the torso of each given row from the video, in one pass over it.
+
+    Returns an array (len(rows), h, w, 3) of BGR crops resized to CROP_SIZE.
+    """
+    frames = columns["frame"][rows]
+    order = np.argsort(frames, kind="stable")
+    crops = np.zeros((len(rows), CROP_SIZE[1], CROP_SIZE[0], 3), np.uint8)
+
+    # Every crop is copied out by cv2.resize before the next read, so one
+    # reused frame buffer is enough
+    video = open_decoder(video_path, decoder, reuse=True)
+    pos = 0
+    frame = None
+    for i in order:
+        want = int(frames[i])
+        if want - pos > SEEK_FRAMES:
+            video.seek(want)
+            pos = want
+        while pos <= want:
+            frame = video.read()
+            if frame is None:
+                video.close()
+                raise RuntimeError(f"{video_path} ended before frame {want}")
+            pos += 1
+
+        x1, y1, x2, y2 = columns["bbox"][rows[i]]
+        w, h = x2 - x1, y2 - y1
+        tx1, ty1, tx2, ty2 = TORSO
+        fh, fw = frame.shape[:2]
+        cx1, cx2 = int(max(0, x1 + tx1 * w)), int(min(fw, x1 + tx2 * w))
+        cy1, cy2 = int(max(0, y1 + ty1 * h)), int(min(fh, y1 + ty2 * h))
+        if cx2 > cx1 and cy2 > cy1:
+            crops[i] = cv2.resize(frame[cy1:cy2, cx1:cx2], CROP_SIZE, interpolation=cv2.INTER_AREA)
+    video.close()
+    return crops
+
+
+def color_histograms(crops):
+    """Joint hue/saturation histograms for a batch of BGR crops, shape (N, bins)."""
+    n = len(crops)
+    bins = HUE_BINS * SAT_BINS
+    if n == 0:
+        return np.zeros((0, bins))
+    # cvtColor wants a 2-D image, so stack the batch vertically
+    h, w = crops.shape[1:3]
+    hsv = cv2.cvtColor(crops.reshape(n * h, w, 3), cv2.COLOR_BGR2HSV).reshape(n, h * w, 3)
+    hue = hsv[..., 0].astype(np.int64) * HUE_BINS // 180
+    sat = hsv[..., 1].astype(np.int64) * SAT_BINS // 256
+    cell = hue * SAT_BINS + sat + np.arange(n)[:, None] * bins
+    hist = np.bincount(cell.ravel(), minlength=n * bins).reshape(n, bins).astype(np.float64)
+    return hist / np.maximum(hist.sum(axis=1, keepdims=True), 1)
+
+
+def track_embeddings(columns, video_path):
+    """Returns {track id: unit embedding} from sampled torso color histograms."""
+    rows = pick_samples(columns)
+    hists = color_histograms(read_crops(video_path, columns, rows))
+    # sqrt makes the dot product of two embeddings the Bhattacharyya coefficient
+    hists = np.sqrt(hists)
+    ids = columns["id"][rows]
+    embeddings = {}
+    for track_id in np.unique(ids):
+        mean = hists[ids == track_id].mean(axis=0)
+        embeddings[int(track_id)] = mean / max(np.linalg.norm(mean), 1e-9)
+    return embeddings
+
+
+def fragments(columns):
+    """Per track: first/last frame and the bbox at each end."""
+    ids, frames, bbox = columns["id"], columns["frame"], columns["bbox"]
+    order = np.lexsort((frames, ids))
+    sorted_ids = ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    out = {}
+    for s, e in zip(order[starts], order[ends]):
+        out[int(ids[s])] = {
+            "first": int(frames[s]),
+            "last": int(frames[e]),
+            "first_box": bbox[s].astype(float),
+            "last_box": bbox[e].astype(float),
+        }
+    return out
+
+
+def _center(box):
+    return np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2])
+
+
+def link_fragments(frags, embeddings, fps, max_gap_seconds=MAX_GAP_SECONDS, min_similarity=MIN_SIMILARITY):
+    """Returns {track id: merged id}, chaining fragments that don't overlap in time."""
+    max_gap = max_gap_seconds * fps
+    candidates = []
+    for a, fa in frags.items():
+        for b, fb in frags.items():
+            gap = fb["first"] - fa["last"]
+            if a == b or gap <= 0 or gap > max_gap:
+                continue
+            if a not in embeddings or b not in embeddings:
+                continue
+            height = max(fa["last_box"][3] - fa["last_box"][1], 1.0)
+            reach = (MAX_SPEED * gap / fps + SLACK) * height
+            if np.linalg.norm(_center(fb["first_box"]) - _center(fa["last_box"])) > reach:
+                continue
+            similarity = float(embeddings[a] @ embeddings[b])
+            if similarity >= min_similarity:
+                candidates.append((similarity, a, b))
+
+    successor, predecessor = {}, {}
+    for similarity, a, b in sorted(candidates, reverse=True):
+        # b starts after a ends, so linking a chain's tail to another chain's
+        # head can never create overlap in time or a cycle
+        if a in successor or b in predecessor:
+            continue
+        successor[a] = b
+        predecessor[b] = a
+
+    mapping = {}
+    for head in frags:
+        if head in predecessor:
+            continue
+        node = head
+        while node is not None:
+            mapping[node] = head
+            node = successor.get(node)
+    return mapping
+
+
+def apply_mapping(columns, mapping):
+    """Returns columns with every id replaced by mapping[id]."""
+    keys = np.array(sorted(mapping), dtype=np.int64)
+    values = np.array([mapping[k] for k in keys], dtype=np.int64)
+    ids = columns["id"].astype(np.int64)
+    new_ids = values[np.searchsorted(keys, ids)] if len(keys) else ids
+    return dict(columns, id=new_ids.astype(columns["id"].dtype))
+
+
+def merge_tracks(columns, video_path, fps, **link_options):
+    """Full pass: embeddings, linking and rewriting. Returns (columns, mapping)."""
+    embeddings = track_embeddings(columns, video_path)
+    mapping = link_fragments(fragments(columns), embeddings, fps, **link_options)
+    return apply_mapping(columns, mapping), mapping
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge fragmented track ids by appearance")
+    parser.add_argument("tracks", help="Input track file (json, jsonl or .trk)")
+    parser.add_argument("video", help="The video the tracks came from")
+    parser.add_argument("out", nargs="?", help="Output path (default: <stem>_reid<suffix>); format follows the suffix")
+    parser.add_argument("--max-gap-seconds", type=float, default=MAX_GAP_SECONDS,
+                        help=f"Longest gap between fragments to bridge (default: {MAX_GAP_SECONDS})")
+    parser.add_argument("--min-similarity", type=float, default=MIN_SIMILARITY,
+                        help=f"Minimum appearance similarity, 0-1 (default: {MIN_SIMILARITY})")
+    parser.add_argument("--mapping", help="Also write the {old id: new id} mapping as JSON here")
+    args = parser.parse_args()
+
+    src = Path(args.tracks)
+    out = Path(args.out) if args.out else src.with_name(f"{src.stem}_reid{src.suffix}")
+
+    meta, columns = load_columns(src)
+    merged, mapping = merge_tracks(
+        columns, args.video, meta["fps"],
+        max_gap_seconds=args.max_gap_seconds,
+        min_similarity=args.min_similarity,
+    )
+    save_columns(out, meta, merged)
+
+    changed = {old: new for old, new in mapping.items() if old != new}
+    if args.mapping:
+        Path(args.mapping).write_text(json.dumps({str(k): v for k, v in sorted(mapping.items())}))
+    for old, new in sorted(changed.items()):
+        print(f"  {old} -> {new}", file=sys.stderr)
+    print(f"Wrote {out}: {len(mapping)} tracks merged into {len(set(mapping.values()))}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# track_smooth.py
+"""Offline smoothing and gap-filling for track_video output.
+
+Two passes, both vectorized over every track at once (rows are sorted by
+(track id, frame) so each track is a contiguous run; there is no per-frame
+or per-track Python loop):
+
+fill_gaps   A track missing for up to max_gap frames between two
+            observations gets the missing frames filled by constant-velocity
+            (linear) interpolation. Filled rows are flagged "filled".
+
+smooth      Each bbox coordinate is replaced by a centered moving average
+            over up to `window` frames of the same unbroken run. A centered
+            mean is the least-squares constant-velocity fit evaluated at the
+            window center, and the window shrinks symmetrically at run ends,
+            so steady motion passes through unchanged while jitter is
+            averaged out.
+
+Usage:
+    python track_smooth.py ../public/bruno_tracks.json ../public/bruno_tracks_smooth.json
+    python track_smooth.py tracks.trk smooth.trk --max-gap 50 --window 9
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from track_format import FLAG_FILLED, load_columns, save_columns
+
+MAX_GAP = 25
+WINDOW = 5
+
+_ROW_COLUMNS = ("frame", "id", "conf", "bbox", "flags")
+
+
+def sort_by_track(columns):
+    """Returns the per-row columns reordered by (id, frame)."""
+    rows = {name: columns[name] for name in _ROW_COLUMNS if name in columns}
+    if "flags" not in rows:
+        rows["flags"] = np.zeros(len(rows["id"]), np.uint8)
+    order = np.lexsort((rows["frame"], rows["id"]))
+    return {
+        "frame": rows["frame"][order].astype(np.int64),
+        "id": rows["id"][order],
+        "conf": rows["conf"][order].astype(np.float64),
+        "bbox": rows["bbox"][order].astype(np.float64),
+        "flags": rows["flags"][order],
+    }
+
+
+def fill_gaps(rows, max_gap=MAX_GAP):
+    """Linearly fills gaps of up to max_gap frames inside each track.
+
+    rows must be sorted by (id, frame). Returns new rows, still sorted.
+    """
+    frame, ids, conf, bbox = rows["frame"], rows["id"], rows["conf"], rows["bbox"]
+    if len(frame) < 2:
+        return rows
+
+    step = frame[1:] - frame[:-1]
+    same_track = ids[1:] == ids[:-1]
+    missing = np.where(same_track & (step > 1) & (step - 1 <= max_gap), step - 1, 0)
+    total = int(missing.sum())
+    if total == 0:
+        return rows
+
+    # For every filled sample: its left neighbour row and its position k in the gap
+    left = np.repeat(np.arange(len(missing)), missing)
+    gap_start = np.cumsum(missing) - missing
+    k = np.arange(total) - np.repeat(gap_start, missing) + 1
+    right = left + 1
+    a = k / step[left]
+
+    filled = {
+        "frame": frame[left] + k,
+        "id": ids[left],
+        "conf": conf[left] + a * (conf[right] - conf[left]),
+        "bbox": bbox[left] + a[:, None] * (bbox[right] - bbox[left]),
+        "flags": np.full(total, FLAG_FILLED, rows["flags"].dtype),
+    }
+
+    merged = {name: np.concatenate([rows[name], filled[name]]) for name in rows}
+    order = np.lexsort((merged["frame"], merged["id"]))
+    return {name: col[order] for name, col in merged.items()}
+
+
+def smooth(rows, window=WINDOW):
+    """Centered moving average of bboxes within each unbroken run of a track.
+
+    rows must be sorted by (id, frame). A run breaks where the track id
+    changes or a frame is missing (a gap longer than fill_gaps fills).
+    """
+    half = window // 2
+    n = len(rows["frame"])
+    if half < 1 or n == 0:
+        return rows
+
+    frame, ids, bbox = rows["frame"], rows["id"], rows["bbox"]
+    breaks = np.ones(n, bool)
+    breaks[1:] = (ids[1:] != ids[:-1]) | (frame[1:] - frame[:-1] != 1)
+    run = np.cumsum(breaks) - 1
+    run_start = np.flatnonzero(breaks)
+    run_end = np.append(run_start[1:], n)
+
+    i = np.arange(n)
+    start, end = run_start[run], run_end[run]
+    # Symmetric window, shrunk near run ends so it never reaches past them
+    h = np.minimum(half, np.minimum(i - start, end - 1 - i))
+    lo, hi = i - h, i + h + 1
+
+    csum = np.zeros((n + 1, 4))
+    np.cumsum(bbox, axis=0, out=csum[1:])
+    smoothed = (csum[hi] - csum[lo]) / (hi - lo)[:, None]
+    return dict(rows, bbox=smoothed)
+
+
+def to_columns(rows, t):
+    """Reorders track-sorted rows back into per-frame columns."""
+    order = np.lexsort((rows["id"], rows["frame"]))
+    frame = rows["frame"][order]
+    return {
+        "frame_offsets": np.searchsorted(frame, np.arange(len(t) + 1)).astype("<u4"),
+        "t": np.asarray(t, "<f8"),
+        "frame": frame.astype("<u4"),
+        "id": rows["id"][order].astype("<i4"),
+        "conf": rows["conf"][order].astype("<f4"),
+        "bbox": rows["bbox"][order].astype("<f4"),
+        "flags": rows["flags"][order].astype("u1"),
+    }
+
+
+def smooth_columns(columns, max_gap=MAX_GAP, window=WINDOW):
+    """Gap-fills then smooths columnar tracks; returns new columns."""
+    rows = sort_by_track(columns)
+    rows = fill_gaps(rows, max_gap)
+    rows = smooth(rows, window)
+    return to_columns(rows, columns["t"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smooth and gap-fill track_video output")
+    parser.add_argument("tracks", help="Input track file (json, jsonl or .trk)")
+    parser.add_argument("out", nargs="?", help="Output path (default: <stem>_smooth<suffix>); format follows the suffix")
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP,
+                        help=f"Longest dropout, in frames, to fill (default: {MAX_GAP})")
+    parser.add_argument("--window", type=int, default=WINDOW,
+                        help=f"Smoothing window in frames; 1 disables smoothing (default: {WINDOW})")
+    args = parser.parse_args()
+
+    src = Path(args.tracks)
+    out = Path(args.out) if args.out else src.with_name(f"{src.stem}_smooth{src.suffix}")
+
+    meta, columns = load_columns(src)
+    start = time.perf_counter()
+    result = smooth_columns(columns, args.max_gap, args.window)
+    seconds = time.perf_counter() - start
+    save_columns(out, meta, result)
+
+    filled = int(np.count_nonzero(result["flags"] & FLAG_FILLED))
+    print(f"Wrote {out}: {len(columns['id'])} rows in, {len(result['id'])} out "
+          f"({filled} filled) in {seconds:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
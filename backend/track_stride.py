@@ -0,0 +1,126 @@
+# track_stride.py
+"""Frame-stride detection for track_video.
+
+DetectGate decides which frames go through the detector: every stride-th
+frame, plus any frame whose cheap motion score against the last detected
+frame exceeds a threshold. GapFiller then fills the skipped frames by
+linearly interpolating each track's bbox between the surrounding detected
+frames, marking those boxes with "interp": true.
+"""
+import cv2
+
+# Motion is measured on a tiny grayscale thumbnail; plenty to spot pans and cuts
+MOTION_SIZE = (64, 36)
+
+
+def motion_thumbnail(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+
+
+class DetectGate:
+    """Callable returning True for frames that should run the detector.
+
+    stride            detect at least every stride-th frame (1 = every frame)
+    motion_threshold  also detect when the mean absolute thumbnail difference
+                      (0-255) from the last detected frame exceeds this
+    """
+
+    def __init__(self, stride=1, motion_threshold=None):
+        if stride < 1:
+            raise ValueError(f"stride must be >= 1, got {stride}")
+        self.stride = stride
+        self.motion_threshold = motion_threshold
+        self.since_detect = None
+        self.last_thumb = None
+        self.detected = 0
+        # track_video.track_batches gates frames up to a batch ahead of the
+        # rows it yields, and sets this to state() as of the frame it yielded
+        # last: what a checkpoint at that frame has to record
+        self.output_state = None
+
+    def __call__(self, frame):
+        thumb = motion_thumbnail(frame) if self.motion_threshold is not None else None
+
+        if self.since_detect is None or self.since_detect + 1 >= self.stride:
+            detect = True
+        elif thumb is not None:
+            detect = float(cv2.absdiff(thumb, self.last_thumb).mean()) > self.motion_threshold
+        else:
+            detect = False
+
+        if detect:
+            self.since_detect = 0
+            self.last_thumb = thumb
+            self.detected += 1
+        else:
+            self.since_detect += 1
+        return detect
+
+    def reset(self):
+        # The next frame is detected no matter what (e.g. after a scene cut)
+        self.since_detect = None
+
+    def state(self):
+        """Snapshot of what decides the next frame, for checkpoints."""
+        return {"since_detect": self.since_detect, "last_thumb": self.last_thumb, "detected": self.detected}
+
+    def restore(self, state):
+        self.since_detect = state["since_detect"]
+        self.last_thumb = state["last_thumb"]
+        self.detected = state["detected"]
+
+
+def _lerp_frame(frame, prev, nxt):
+    a = (frame["frame"] - prev["frame"]) / (nxt["frame"] - prev["frame"])
+    nxt_by_id = {tr["id"]: tr for tr in nxt["tracks"]}
+    tracks = []
+    # Only tracks seen on both sides of the gap; anything else would be a guess
+    for p in prev["tracks"]:
+        n = nxt_by_id.get(p["id"])
+        if n is None:
+            continue
+        tracks.append({
+            "id": p["id"],
+            "conf": p["conf"] + a * (n["conf"] - p["conf"]),
+            "bbox": [pv + a * (nv - pv) for pv, nv in zip(p["bbox"], n["bbox"])],
+            "interp": True,
+        })
+    return dict(frame, tracks=tracks)
+
+
+def _hold_frame(frame, prev):
+    tracks = [dict(tr, interp=True) for tr in prev["tracks"]] if prev else []
+    return dict(frame, tracks=tracks)
+
+
+class GapFiller:
+    """Buffers skipped frames (tracks=None) until the next detected frame.
+
+    Frames are passed to emit in order, with skipped frames' tracks filled
+    in. Only the skipped frames since the last detection are held.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.prev = None
+        self.pending = []
+
+    def push(self, frame):
+        if frame["tracks"] is None:
+            self.pending.append(frame)
+            return
+        for skipped in self.pending:
+            if self.prev is None:
+                self.emit(_hold_frame(skipped, None))
+            else:
+                self.emit(_lerp_frame(skipped, self.prev, frame))
+        self.pending = []
+        self.emit(frame)
+        self.prev = frame
+
+    def flush(self):
+        # Nothing to interpolate towards at end of stream; hold the last boxes
+        for skipped in self.pending:
+            self.emit(_hold_frame(skipped, self.prev))
+        self.pending = []
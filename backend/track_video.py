@@ -1,9 +1,31 @@
 # track_video.py
-import json
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import cv2
-from ultralytics import YOLO
+from ultralytics.trackers.basetrack import BaseTrack
+from ultralytics.trackers.byte_tracker import BYTETracker
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
+
+from checkpoint import (checkpoint_path_for, load_checkpoint, restore_tracker, save_checkpoint, snapshot_tracker,
+                        video_stamp)
+from decoders import DECODER, DECODERS, THREADS, open_decoder
+from inference import BACKEND, BACKENDS, export_model, load_model
+from metrics import NULL_METRICS, Metrics
+from pipeline import BackgroundWorker, prefetch
+from roi import auto_roi, clamp_roi, crop, parse_roi
+from scene_cuts import CUT_THRESHOLD, SceneCuts
+from track_cache import CACHE_DIR, CACHE_MAX_MB, TrackCache, cache_key
+from track_format import ENCODINGS, FORMATS, SUFFIXES, JsonlTrackWriter, iter_jsonl, open_writer
+from track_index import TrackIndexBuilder, index_path_for
+from track_stride import DetectGate, GapFiller
 
 VIDEO_PATH = "../src/assets/bruno.mov"
 OUT_JSON = "../public/bruno_tracks.json"
@@ -11,81 +33,695 @@ OUT_JSON = "../public/bruno_tracks.json"
 # Use a fast model first; upgrade later if needed
 MODEL_NAME = "yolov8n.pt"  # or yolov8s.pt for better accuracy
 
-def main():
-    model = YOLO(MODEL_NAME)
+TRACKER_CFG = "bytetrack.yaml"
+CONF = 0.25
+IOU = 0.45
+CLASSES = [0]  # person class in COCO
+
+# Inference image size (long side, pixels); None keeps the model's default.
+# Smaller is faster on CPU at some cost to small, distant players.
+IMGSZ = None
+
+# Frames per detector forward pass. Batching amortizes the per-call
+# overhead of model.predict(); set to 1 for the old frame-by-frame behavior.
+BATCH_SIZE = 8
+
+# Run decode, inference and post-processing on separate threads, connected
+# by bounded queues of QUEUE_SIZE items each
+PIPELINED = True
+QUEUE_SIZE = 32
+
+# Run the detector on every STRIDE-th frame only (plus frames whose motion
+# score exceeds MOTION_THRESHOLD, if set) and interpolate boxes in between
+STRIDE = 1
+MOTION_THRESHOLD = None
+
+# Frames between checkpoints of jsonl runs, so --resume can pick up a run
+# that died partway; 0 disables them
+CHECKPOINT_EVERY = 500
+
+
+def load_tracker(stride=1):
+    # Same construction Ultralytics uses inside model.track(); it always
+    # assumes 30 fps for the lost-track buffer, so we do too. With a stride
+    # the tracker sees fewer updates per second, so scale that down to keep
+    # lost tracks alive for the same wall-clock time.
+    cfg = IterableSimpleNamespace(**yaml_load(check_yaml(TRACKER_CFG)))
+    return BYTETracker(args=cfg, frame_rate=max(1, round(30 / stride)))
+
+
+def reset_tracker(tracker):
+    # BYTETracker.reset() also restarts the global id counter at 1, which
+    # would hand the next shot's players ids already used earlier in the video
+    next_id = BaseTrack._count
+    tracker.reset()
+    BaseTrack._count = next_id
+
+
+def detect_batch(model, frames, imgsz=None):
+    # One forward pass over the whole batch; results come back in input order
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    return model.predict(
+        source=frames,
+        conf=CONF,
+        iou=IOU,
+        classes=CLASSES,
+        verbose=False,
+        **kwargs,
+    )
+
+
+def update_tracker(tracker, result):
+    """Feeds one frame's detections to ByteTrack and returns its track rows.
+
+    Rows are [x1, y1, x2, y2, id, conf, cls, idx], exactly what model.track()
+    writes back into r.boxes when persist=True.
+    """
+    det = result.boxes.cpu().numpy()
+    # model.track() skips the tracker update entirely on empty frames
+    if len(det) == 0:
+        return []
+    return tracker.update(det, result.orig_img)
+
+
+def rows_to_tracks(rows, offset=(0, 0)):
+    # None marks a frame the detector skipped; GapFiller fills it in later
+    if rows is None:
+        return None
+    # offset maps boxes from an ROI crop back to full-frame pixels
+    ox, oy = offset
+    tracks = []
+    for row in rows:
+        x1, y1, x2, y2, track_id, conf = row[:6].tolist()
+        tracks.append({
+            "id": int(track_id),
+            "conf": float(conf),
+            "bbox": [x1 + ox, y1 + oy, x2 + ox, y2 + oy],
+        })
+    return tracks
+
+
+def track_batches(model, tracker, frames, batch_size=BATCH_SIZE, gate=None, imgsz=None, scenes=None,
+                  metrics=NULL_METRICS):
+    """Runs detection batch_size frames at a time, tracking in frame order.
 
-    cap = cv2.VideoCapture(VIDEO_PATH)
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {VIDEO_PATH}")
+    Yields one list of track rows per input frame, or None for frames the
+    gate chose not to detect. With scenes (a scene_cuts.SceneCuts), the
+    tracker is reset at every cut and frames of skipped shots yield [].
+    """
+    # (detected, cut, skipped, gate state after it) for each frame since the
+    # last batch; skipped frames themselves are not kept
+    pending = []
+    batch = []
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    video_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    video_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    def run():
+        with metrics.stage("inference"):
+            results = iter(detect_batch(model, batch, imgsz) if batch else ())
+        for detected, cut, skipped, gate_state in pending:
+            if gate is not None:
+                gate.output_state = gate_state
+            if cut:
+                reset_tracker(tracker)
+            if skipped:
+                yield []
+            elif detected:
+                result = next(results)
+                metrics.observe("detections_per_frame", len(result.boxes))
+                with metrics.stage("tracking"):
+                    rows = update_tracker(tracker, result)
+                yield rows
+            else:
+                yield None
 
-    frames_out = []
-    frame_idx = 0
+    for frame in frames:
+        with metrics.stage("gate"):
+            cut, skipped = scenes(frame) if scenes is not None else (False, False)
+            if cut and gate is not None:
+                # A new shot has nothing to interpolate from
+                gate.reset()
+            detected = not skipped and (gate is None or gate(frame))
+        pending.append((detected, cut, skipped, gate.state() if gate is not None else None))
+        if detected:
+            batch.append(frame)
+        if len(batch) == batch_size:
+            yield from run()
+            pending, batch = [], []
 
-    # Tracking state is kept inside Ultralytics when persist=True
-    while True:
-        ok, frame = cap.read()
-        if not ok:
+    if pending:
+        yield from run()
+
+
+def read_frames(video, count=None, roi=None):
+    # count=None reads to end of stream
+    while count is None or count > 0:
+        if count is not None:
+            count -= 1
+        frame = video.read()
+        if frame is None:
             break
+        yield crop(frame, roi) if roi else frame
 
-        # track() runs detection + tracking
-        results = model.track(
-            source=frame,
-            persist=True,
-            tracker="bytetrack.yaml",
-            conf=0.25,
-            iou=0.45,
-            classes=[0],  # person class in COCO
-            verbose=False,
-        )
-
-        r = results[0]
-        tracks = []
-
-        # r.boxes contains boxes; r.boxes.id contains track IDs (when available)
-        if r.boxes is not None and r.boxes.xyxy is not None:
-            xyxy = r.boxes.xyxy.cpu().numpy()  # (N,4)
-            confs = r.boxes.conf.cpu().numpy() if r.boxes.conf is not None else None
-            ids = r.boxes.id.cpu().numpy() if r.boxes.id is not None else None
-
-            for i in range(len(xyxy)):
-                x1, y1, x2, y2 = xyxy[i].tolist()
-                conf = float(confs[i]) if confs is not None else 0.0
-                track_id = int(ids[i]) if ids is not None else -1
-
-                # Skip untracked detections if you want stable IDs only
-                if track_id == -1:
-                    continue
 
-                tracks.append({
-                    "id": track_id,
-                    "conf": conf,
-                    "bbox": [x1, y1, x2, y2],
-                })
+def resolve_roi(roi, video_path, video_w, video_h, decoder=DECODER):
+    """Turns an ROI option ("auto", tuple or None) into a clamped tuple or None."""
+    if roi == "auto":
+        roi = auto_roi(video_path, decoder=decoder)
+        if roi is None:
+            print(f"Warning: no pitch found in {video_path}; using the full frame", file=sys.stderr)
+    if roi is None:
+        return None
+    roi = clamp_roi(roi, video_w, video_h)
+    return None if roi == (0, 0, video_w, video_h) else roi
+
+
+def track_video(model, video_path, out_path, batch_size=BATCH_SIZE, pipelined=PIPELINED, fmt="json",
+                stride=STRIDE, motion_threshold=MOTION_THRESHOLD, index=False, imgsz=IMGSZ, roi=None,
+                checkpoint_every=CHECKPOINT_EVERY, resume=False, decoder=DECODER, decode_threads=THREADS,
+                scene_cuts=False, skip_other_shots=False, cut_threshold=CUT_THRESHOLD,
+                metrics_format=None, trace=False, encoding="float", settings=None):
+    """Tracks one video and writes its tracks to out_path in the given format and encoding.
+
+    jsonl runs checkpoint every checkpoint_every frames; resume=True
+    continues from the last checkpoint instead of frame 0. scene_cuts resets
+    the tracker at camera cuts and records the shots in the output;
+    skip_other_shots also leaves shots without the pitch in view undetected.
+    metrics_format ("json" or "prom") writes per-stage metrics next to the
+    output and trace adds a Chrome trace (see metrics.py). settings (from
+    cache_settings()) are stored in checkpoints, and resuming refuses a
+    checkpoint taken with different ones.
+
+    Returns a small stats dict for the run summary.
+    """
+    if resume and fmt != "jsonl":
+        raise ValueError("Resuming needs jsonl output (--format jsonl)")
+    start = time.perf_counter()
+    instrumented = bool(metrics_format or trace)
+    metrics = Metrics(trace=trace, labels={"video": Path(video_path).name}) if instrumented else NULL_METRICS
+    tracker = load_tracker(stride)
+    gate = DetectGate(stride, motion_threshold) if stride > 1 or motion_threshold is not None else None
+
+    video = open_decoder(video_path, decoder, decode_threads)
+    fps = video.fps
+    video_w = video.width
+    video_h = video.height
+    roi = resolve_roi(roi, video_path, video_w, video_h, decoder)
+    offset = roi[:2] if roi else (0, 0)
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "videoW": video_w,
+        "videoH": video_h,
+        "fps": fps,
+    }
+    builder = TrackIndexBuilder(meta) if index else None
+    ckpt_path = checkpoint_path_for(out_path)
+    state = load_checkpoint(ckpt_path, video_path, settings) if resume else None
+    if state is not None:
+        start_frame = state["next_frame"]
+        tracker = restore_tracker(state["tracker"])
+        if gate is not None:
+            # Carries on the stride and motion reference from the checkpoint frame
+            gate.restore(state["gate"])
+        video.seek(start_frame)
+        writer = JsonlTrackWriter.resume(out_path, state["writer"])
+        if builder is not None:
+            # Rebuild the index from what's already on disk
+            _, done, _ = iter_jsonl(out_path)
+            for frame in done:
+                builder.add_frame(frame)
+        print(f"Resuming {video_path} at frame {start_frame}", file=sys.stderr)
+    else:
+        if resume:
+            print(f"No checkpoint for {out_path}; starting from frame 0", file=sys.stderr)
+        start_frame = 0
+        writer = open_writer(fmt, out_path, meta, encoding)
+    checkpoint_every = checkpoint_every if fmt == "jsonl" else 0
+    stamp = video_stamp(video_path) if checkpoint_every else None
+    num_frames = start_frame
+    # Frames detected before the resume aren't this run's work
+    detected_before = gate.detected if gate is not None else 0
+    scenes = None
+    if scene_cuts or skip_other_shots:
+        scenes = SceneCuts(cut_threshold, skip_other_shots, start_frame=start_frame,
+                           shots=state.get("shots") if state is not None else None)
 
+    def emit(item):
+        nonlocal num_frames
+        frame_idx, rows = item[:2]
         t = frame_idx / fps
-        frames_out.append({
+        num_frames += 1
+        if scenes is not None and frame_idx in scenes.cut_frames:
+            # Never interpolate across a cut; hold the old shot's last boxes instead
+            filler.flush()
+        with metrics.stage("build"):
+            tracks = rows_to_tracks(rows, offset)
+        filler.push({
             "frame": frame_idx,
             "t": t,
             "tracks": tracks,
         })
+        if len(item) > 2:
+            # A detected frame, so nothing is left pending in the filler and
+            # everything up to it is on disk
+            with metrics.stage("checkpoint"):
+                save_checkpoint(ckpt_path, {
+                    "video": stamp,
+                    "settings": settings,
+                    "next_frame": frame_idx + 1,
+                    "tracker": item[2],
+                    "gate": item[3],
+                    "writer": writer.state(),
+                    "filler_prev": filler.prev,
+                    "shots": scenes.shots_until(frame_idx) if scenes is not None else None,
+                })
+        if decoded:
+            metrics.observe("frame_latency_seconds", time.perf_counter() - decoded.popleft())
 
-        frame_idx += 1
+    def write(frame):
+        with metrics.stage("write"):
+            writer.write_frame(frame)
+            if builder is not None:
+                builder.add_frame(frame)
 
-    cap.release()
+    # When instrumented, the time each frame came out of the decoder, in
+    # frame order, for the decode -> post-processing latency
+    decoded = deque()
 
-    payload = {
-        "videoW": video_w,
-        "videoH": video_h,
-        "fps": fps,
-        "frames": frames_out,
+    def stamped(frames):
+        for frame in frames:
+            decoded.append(time.perf_counter())
+            yield frame
+
+    filler = GapFiller(write)
+    if state is not None:
+        filler.prev = state["filler_prev"]
+
+    frames = metrics.timed("decode", read_frames(video, roi=roi))
+    if instrumented:
+        frames = stamped(frames)
+    if pipelined:
+        # Decoder thread -> bounded queue -> inference (this thread)
+        # -> bounded queue -> post-processing thread
+        frames = prefetch(frames, maxsize=QUEUE_SIZE)
+        post = BackgroundWorker(emit, maxsize=QUEUE_SIZE, name="postprocess")
+    else:
+        post = None
+
+    try:
+        try:
+            # Detection is batched, but ByteTrack still sees every frame in order
+            last_checkpoint = start_frame
+            rows_iter = track_batches(model, tracker, frames, batch_size, gate, imgsz, scenes, metrics)
+            for item in enumerate(rows_iter, start=start_frame):
+                frame_idx, rows = item
+                # rows_iter is lazy, so right now the tracker has seen exactly
+                # frames up to frame_idx: snapshot it to go with this frame.
+                # The gate has run ahead, so take its state as of frame_idx.
+                if checkpoint_every and rows is not None and frame_idx - last_checkpoint >= checkpoint_every:
+                    item = (frame_idx, rows, snapshot_tracker(tracker),
+                            gate.output_state if gate is not None else None)
+                    last_checkpoint = frame_idx
+                if post is not None:
+                    post.put(item)
+                else:
+                    emit(item)
+        finally:
+            # Stops the decoder thread too if we bailed out early
+            frames.close()
+            if post is not None:
+                post.close()
+    except BaseException:
+        # Keep whatever was flushed; jsonl output stays readable
+        writer.abort()
+        raise
+    finally:
+        video.close()
+
+    filler.flush()
+    writer.close({"shots": scenes.finish()} if scenes is not None else None)
+    if builder is not None:
+        builder.write(index_path_for(out_path))
+    # The output is complete, so there's nothing left to resume
+    ckpt_path.unlink(missing_ok=True)
+
+    if gate is not None:
+        detected = gate.detected - detected_before
+    else:
+        detected = num_frames - start_frame - (scenes.skipped_frames if scenes is not None else 0)
+    metrics_path = trace_path = None
+    if instrumented:
+        metrics.count("frames", num_frames - start_frame)
+        metrics.count("detected_frames", detected)
+        if metrics_format:
+            metrics_path = out_path.with_name(f"{out_path.name}.metrics.{metrics_format}")
+            metrics.write(metrics_path)
+        if trace:
+            trace_path = out_path.with_name(f"{out_path.name}.trace.json")
+            metrics.write_trace(trace_path)
+
+    seconds = time.perf_counter() - start
+    return {
+        "video": str(video_path),
+        "metrics": str(metrics_path) if metrics_path else None,
+        "trace": str(trace_path) if trace_path else None,
+        "out": str(out_path),
+        "index": str(index_path_for(out_path)) if index else None,
+        "roi": roi,
+        "resumed_from": start_frame,
+        "frames": num_frames,
+        "detected": detected,
+        "shots": len(scenes.shots) if scenes is not None else None,
+        "seconds": seconds,
+        # Only the frames this run processed, not the ones before the resume
+        "fps": (num_frames - start_frame) / seconds if seconds > 0 else 0.0,
     }
 
-    Path(OUT_JSON).write_text(json.dumps(payload))
-    print(f"Wrote {OUT_JSON} with {len(frames_out)} frames")
+
+# Per-process model, loaded once on first use after _init_worker
+_worker_model = None
+_worker_model_name = MODEL_NAME
+_worker_backend = BACKEND
+_worker_threads = None
+
+
+def _init_worker(model_name, threads, backend=BACKEND):
+    # threads limits inference threads: N workers each using every core
+    # just fight over them
+    global _worker_model_name, _worker_backend, _worker_threads
+    _worker_model_name = model_name
+    _worker_backend = backend
+    _worker_threads = threads
+
+
+def _get_model(batch_size=BATCH_SIZE, imgsz=IMGSZ):
+    # Lazy so a run that is all cache hits never loads the model. Warm-up
+    # runs at the batch size and image size the run will actually use.
+    global _worker_model
+    if _worker_model is None:
+        _worker_model = load_model(_worker_model_name, _worker_backend, _worker_threads, batch_size, imgsz)
+    return _worker_model
+
+
+def cache_settings(model_name, options, chunking=None, backend=BACKEND):
+    """Everything besides the video bytes that changes the output."""
+    return {
+        "model": model_name,
+        # Backends agree up to float rounding, which can still flip a borderline box
+        "backend": backend,
+        "tracker": TRACKER_CFG,
+        "tracker_cfg": Path(check_yaml(TRACKER_CFG)).read_text(),
+        "conf": CONF,
+        "iou": IOU,
+        "classes": CLASSES,
+        "options": {k: options.get(k) for k in (
+            "fmt", "stride", "motion_threshold", "imgsz", "roi", "decoder",
+            "scene_cuts", "skip_other_shots", "cut_threshold", "encoding",
+        )},
+        "chunking": chunking,
+    }
+
+
+def run_cached(cache, settings, video_path, out_path, options, run):
+    """Returns run()'s stats, or serves the result from cache if it's there."""
+    if cache is None:
+        return run()
+    start = time.perf_counter()
+    key = cache_key(video_path, settings)
+    index_path = index_path_for(out_path) if options.get("index") else None
+    cached = cache.fetch(key, out_path, index_path)
+    if cached is not None:
+        seconds = time.perf_counter() - start
+        return dict(cached, video=str(video_path), out=str(out_path), seconds=seconds,
+                    fps=cached.get("frames", 0) / seconds if seconds > 0 else 0.0, cached=True)
+    stats = run()
+    cache.store(key, out_path, index_path, stats)
+    return stats
+
+
+def _run_job(job):
+    video_path, out_path, options, cache, settings = job
+    return run_cached(
+        cache, settings, video_path, out_path, options,
+        lambda: track_video(
+            _get_model(options.get("batch_size", BATCH_SIZE), options.get("imgsz")),
+            video_path, out_path, settings=settings, **options,
+        ),
+    )
+
+
+def expand_inputs(patterns, manifest=None):
+    """Resolves files, globs and manifest entries to (video, out or None) pairs.
+
+    Manifest lines are "video [output]"; blank lines and # comments are skipped.
+    """
+    jobs = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                print(f"Warning: no files match {pattern}", file=sys.stderr)
+            jobs.extend((m, None) for m in matches)
+        else:
+            jobs.append((pattern, None))
+
+    if manifest:
+        for line in Path(manifest).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(maxsplit=1)
+            jobs.append((parts[0], parts[1] if len(parts) > 1 else None))
+
+    return jobs
+
+
+def default_out_path(video_path, out_dir, fmt="json"):
+    # bruno.mov -> <out_dir>/bruno_tracks.json (or .trk for columnar)
+    video_path = Path(video_path)
+    return Path(out_dir or video_path.parent) / f"{video_path.stem}_tracks{SUFFIXES[fmt]}"
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Track people in one or more videos with YOLO + ByteTrack",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  # Default demo clip ({VIDEO_PATH} -> {OUT_JSON})
+  python track_video.py
+
+  # Every clip in the assets folder, 4 worker processes
+  python track_video.py "../src/assets/*.mov" --out-dir ../public --workers 4
+        """
+    )
+    parser.add_argument("inputs", nargs="*", help="Video files or glob patterns")
+    parser.add_argument("--manifest", help="Text file with one 'video [output]' per line")
+    parser.add_argument("--out", help="Output path (only valid with a single input)")
+    parser.add_argument("--out-dir", help="Directory for <stem>_tracks.json outputs (default: next to each video)")
+    parser.add_argument("--model", default=MODEL_NAME, help=f"YOLO weights (default: {MODEL_NAME})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, each with its own model (default: CPU count)")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND,
+                        help=f"Inference backend; onnx and openvino export the weights once and "
+                             f"cache them (see inference.py) (default: {BACKEND})")
+    parser.add_argument("--threads", type=int,
+                        help="Inference threads per worker (default: CPU count / workers)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Frames per detector forward pass (default: {BATCH_SIZE})")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="Decode, detect and post-process on a single thread")
+    parser.add_argument("--format", choices=FORMATS, default="json",
+                        help="Output format: classic JSON, crash-safe JSON Lines, or the columnar "
+                             "binary .trk (default: json)")
+    parser.add_argument("--encoding", choices=ENCODINGS, default="float",
+                        help="Coordinate encoding: full-precision floats, quantized (integer pixels; "
+                             "int16/uint8 columns in .trk) or, for columnar only, quantized and "
+                             "delta-encoded per track (default: float)")
+    parser.add_argument("--stride", type=int, default=STRIDE,
+                        help="Run the detector every Nth frame and interpolate the rest (default: 1)")
+    parser.add_argument("--motion-threshold", type=float, default=MOTION_THRESHOLD,
+                        help="Also detect skipped frames whose mean thumbnail difference (0-255) "
+                             "from the last detected frame exceeds this")
+    parser.add_argument("--imgsz", type=int, default=IMGSZ,
+                        help="Inference image size in pixels (default: the model's own, usually 640)")
+    parser.add_argument("--roi", type=parse_roi,
+                        help="Crop frames before detection: 'x1,y1,x2,y2' in pixels, or 'auto' to "
+                             "find the pitch from its green; boxes are mapped back to full-frame")
+    parser.add_argument("--decoder", choices=DECODERS, default=DECODER,
+                        help=f"Video decoder backend; see decoders.py (default: {DECODER})")
+    parser.add_argument("--decode-threads", type=int, default=THREADS,
+                        help="Decoder threads; 0 lets the decoder choose (default: 0)")
+    parser.add_argument("--scene-cuts", action="store_true",
+                        help="Reset the tracker at camera cuts and record shots in the output (see scene_cuts.py)")
+    parser.add_argument("--skip-other-shots", action="store_true",
+                        help="With scene cuts, don't run the detector on shots without the pitch in view")
+    parser.add_argument("--cut-threshold", type=float, default=CUT_THRESHOLD,
+                        help=f"Histogram distance (0-1) that counts as a cut (default: {CUT_THRESHOLD})")
+    parser.add_argument("--metrics", choices=("json", "prom"), dest="metrics_format",
+                        help="Write per-stage timings, latency and detection histograms and peak memory "
+                             "to <out>.metrics.json or <out>.metrics.prom (Prometheus text); "
+                             "bypasses the result cache")
+    parser.add_argument("--trace", action="store_true",
+                        help="Write a Chrome trace of every stage call to <out>.trace.json; "
+                             "bypasses the result cache")
+    parser.add_argument("--chunk-seconds", type=float,
+                        help="Split each video into chunks of this many seconds, track them in "
+                             "parallel and stitch ids across chunks (see track_chunks.py)")
+    parser.add_argument("--overlap-seconds", type=float, default=2.0,
+                        help="Warm-up overlap between chunks used to stitch ids (default: 2)")
+    parser.add_argument("--index", action="store_true",
+                        help="Also write a track-centric <out stem>_index.json (see track_index.py)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help=f"Checkpoint jsonl runs every N frames; 0 disables (default: {CHECKPOINT_EVERY})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue each jsonl output from its last checkpoint instead of frame 0")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR),
+                        help=f"Result cache keyed by video content and settings (default: {CACHE_DIR})")
+    parser.add_argument("--cache-max-mb", type=float, default=CACHE_MAX_MB,
+                        help=f"Evict least recently used results past this size (default: {CACHE_MAX_MB})")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-track, and don't store results")
+    return parser.parse_args()
+
+
+def print_summary(stats):
+    print(f"{'video':<40} {'frames':>8} {'detected':>9} {'seconds':>9} {'fps':>8}")
+    for s in stats:
+        print(f"{Path(s['video']).name:<40} {s['frames']:>8} {s['detected']:>9} "
+              f"{s['seconds']:>9.2f} {s['fps']:>8.1f}")
+    total_frames = sum(s["frames"] for s in stats)
+    total_seconds = sum(s["seconds"] for s in stats)
+    total_detected = sum(s["detected"] for s in stats)
+    print(f"{'total':<40} {total_frames:>8} {total_detected:>9} {total_seconds:>9.2f}")
+
+
+def main():
+    args = parse_arguments()
+
+    jobs = expand_inputs(args.inputs, args.manifest)
+    if not jobs:
+        jobs = [(VIDEO_PATH, Path(OUT_JSON).with_suffix(SUFFIXES[args.format]))]
+    if args.out:
+        if len(jobs) != 1:
+            print("Error: --out only works with a single input; use --out-dir", file=sys.stderr)
+            return 1
+        jobs = [(jobs[0][0], args.out)]
+
+    options = {
+        "batch_size": args.batch_size,
+        "pipelined": not args.no_pipeline,
+        "fmt": args.format,
+        "stride": args.stride,
+        "motion_threshold": args.motion_threshold,
+        "index": args.index,
+        "imgsz": args.imgsz,
+        "roi": args.roi,
+        "checkpoint_every": args.checkpoint_every,
+        "resume": args.resume,
+        "decoder": args.decoder,
+        "decode_threads": args.decode_threads,
+        "scene_cuts": args.scene_cuts,
+        "skip_other_shots": args.skip_other_shots,
+        "cut_threshold": args.cut_threshold,
+        "metrics_format": args.metrics_format,
+        "trace": args.trace,
+        "encoding": args.encoding,
+    }
+    if args.encoding == "delta" and args.format != "columnar":
+        print("Error: --encoding delta needs --format columnar", file=sys.stderr)
+        return 1
+    if args.resume and args.format != "jsonl":
+        print("Error: --resume needs --format jsonl", file=sys.stderr)
+        return 1
+    if args.resume and args.chunk_seconds:
+        print("Error: --resume is not supported with --chunk-seconds", file=sys.stderr)
+        return 1
+    if (args.scene_cuts or args.skip_other_shots) and args.chunk_seconds:
+        print("Error: --scene-cuts is not supported with --chunk-seconds", file=sys.stderr)
+        return 1
+    if (args.metrics_format or args.trace) and args.chunk_seconds:
+        print("Error: --metrics and --trace are not supported with --chunk-seconds", file=sys.stderr)
+        return 1
+    # A cache hit never runs the tracker, so there would be nothing to measure
+    instrumented = bool(args.metrics_format or args.trace)
+    cache = None if args.no_cache or instrumented else TrackCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    chunking = {"chunk_seconds": args.chunk_seconds, "overlap_seconds": args.overlap_seconds} \
+        if args.chunk_seconds else None
+    settings = cache_settings(args.model, options, chunking, args.backend)
+    jobs = [
+        (video, out or default_out_path(video, args.out_dir, args.format), options, cache, settings)
+        for video, out in jobs
+    ]
+
+    if args.backend != "torch":
+        # Export once up front rather than racing to do it in every worker
+        try:
+            export_model(args.model, args.backend)
+        except Exception as e:
+            print(f"Error: could not export {args.model} for {args.backend}: {e}", file=sys.stderr)
+            return 1
+
+    workers = max(1, min(args.workers, len(jobs)))
+    wall_start = time.perf_counter()
+    stats = []
+
+    if args.chunk_seconds:
+        # Parallelism comes from chunks within each video instead
+        from track_chunks import track_video_chunked
+
+        workers = args.workers
+        for video, out, options, cache, settings in jobs:
+            try:
+                s = run_cached(cache, settings, video, out, options, lambda: track_video_chunked(
+                    video, out, args.model, workers,
+                    chunk_seconds=args.chunk_seconds,
+                    overlap_seconds=args.overlap_seconds,
+                    backend=args.backend,
+                    threads=args.threads,
+                    **options,
+                ))
+            except Exception as e:
+                print(f"Error: {video}: {e}", file=sys.stderr)
+                continue
+            print(f"Wrote {s['out']} with {s['frames']} frames{' (cached)' if s.get('cached') else ''}")
+            stats.append(s)
+    elif workers == 1:
+        _init_worker(args.model, args.threads, args.backend)
+        for job in jobs:
+            try:
+                s = _run_job(job)
+            except Exception as e:
+                print(f"Error: {job[0]}: {e}", file=sys.stderr)
+                continue
+            print(f"Wrote {s['out']} with {s['frames']} frames{' (cached)' if s.get('cached') else ''}")
+            stats.append(s)
+    else:
+        threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+        # spawn, not fork: forking after torch has started its thread pools can deadlock
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(args.model, threads, args.backend),
+        ) as pool:
+            futures = {pool.submit(_run_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                video = futures[future][0]
+                try:
+                    s = future.result()
+                except Exception as e:
+                    print(f"Error: {video}: {e}", file=sys.stderr)
+                    continue
+                print(f"Wrote {s['out']} with {s['frames']} frames{' (cached)' if s.get('cached') else ''}")
+                stats.append(s)
+
+    print_summary(stats)
+    wall = time.perf_counter() - wall_start
+    total_frames = sum(s["frames"] for s in stats)
+    print(f"Wall time {wall:.2f}s, {total_frames / wall if wall > 0 else 0.0:.1f} frames/s across {workers} worker(s)")
+
+    return 0 if len(stats) == len(jobs) else 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Per-call latency of fresh versus pooled API clients.
+
+Starts a local stand-in server that answers every POST with a small JSON
+body (over HTTPS with a throwaway self-signed certificate when openssl is
+on PATH, so the TLS handshake is part of what's measured) and times:
+
+- requests.post per call, as the code did before clients.py
+- clients.post on the shared keep-alive session
+
+and, when boto3 is installed, the cost of building a bedrock-runtime client
+per call versus clients.bedrock_client() (no request is sent).
+
+Usage:
+    python bench_clients.py --calls 200
+    python bench_clients.py --calls 200 --no-tls --json bench_clients.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import clients
+
+RESPONSE = json.dumps({"choices": [{"message": {"content": "{\"x\": 1, \"y\": 2}"}}]}).encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so pooled connections are actually kept alive
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def self_signed_cert(directory):
+    """(cert, key) paths of a throwaway localhost certificate."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def start_server(tls_dir=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    scheme, verify = "http", True
+    if tls_dir:
+        cert, key = self_signed_cert(tls_dir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme, verify = "https", cert
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/v1/chat/completions", verify
+
+
+def time_calls(fn, calls):
+    seconds = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return {
+        "calls": calls,
+        "mean_ms": statistics.mean(seconds) * 1000,
+        "p50_ms": statistics.median(seconds) * 1000,
+        "max_ms": max(seconds) * 1000,
+    }
+
+
+def run_benchmark(calls, tls=True):
+    import requests
+
+    results = {}
+    body = {"model": "stand-in", "messages": [{"role": "user", "content": "hi"}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url, verify = start_server(tmp if tls else None)
+        try:
+            results["http_fresh"] = time_calls(
+                lambda: requests.post(url, json=body, verify=verify, timeout=10).raise_for_status(), calls,
+            )
+            clients.session("bench").verify = verify
+            clients.post("bench", url, json=body)  # open the pooled connection
+            results["http_pooled"] = time_calls(
+                lambda: clients.post("bench", url, json=body).raise_for_status(), calls,
+            )
+        finally:
+            server.shutdown()
+            clients.close_clients()
+
+    if clients.BOTO3_AVAILABLE:
+        import boto3
+
+        region = os.getenv("AWS_REGION", "us-east-1")
+        boto_calls = max(1, calls // 10)
+        results["bedrock_fresh"] = time_calls(lambda: boto3.client("bedrock-runtime", region_name=region), boto_calls)
+        clients.bedrock_client(region)
+        results["bedrock_cached"] = time_calls(lambda: clients.bedrock_client(region), boto_calls)
+        clients.close_clients()
+    return results
+
+
+def print_results(results):
+    print(f"{'case':<16} {'calls':>6} {'mean_ms':>9} {'p50_ms':>9} {'max_ms':>9}")
+    for case, r in results.items():
+        print(f"{case:<16} {r['calls']:>6} {r['mean_ms']:>9.2f} {r['p50_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    for fresh, pooled in (("http_fresh", "http_pooled"), ("bedrock_fresh", "bedrock_cached")):
+        if fresh in results and pooled in results:
+            saved = results[fresh]["mean_ms"] - results[pooled]["mean_ms"]
+            print(f"{pooled}: {saved:.2f} ms saved per call")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fresh versus pooled API clients")
+    parser.add_argument("--calls", type=int, default=100, help="Requests per case (default: 100)")
+    parser.add_argument("--no-tls", action="store_true", help="Serve plain HTTP instead of HTTPS")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not clients.REQUESTS_AVAILABLE:
+        print("Error: requests library is required. Install with: pip install requests", file=sys.stderr)
+        return 1
+    tls = not args.no_tls
+    if tls and not shutil.which("openssl"):
+        print("Warning: openssl not on PATH; benchmarking over plain HTTP", file=sys.stderr)
+        tls = False
+
+    results = run_benchmark(args.calls, tls)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Shared, pooled clients for the external APIs.
+
+Building a boto3 client costs tens of milliseconds (endpoint and model
+loading), and a bare requests.post opens a new connection, and so does a
+new TLS handshake, every call. This module keeps one of each per process:
+
+- bedrock_client(region): a bedrock-runtime client per region, cached.
+  boto3 clients are thread-safe, so the process_video branches share it.
+- session(service): a requests.Session per service ("openrouter",
+  "backboard") with keep-alive and a connection pool of POOL_SIZE.
+- post()/get(): session requests with the service's timeout applied.
+
+Timeouts are (connect, read) seconds per service in TIMEOUTS; the read
+timeout can be overridden with <SERVICE>_READ_TIMEOUT (e.g.
+BEDROCK_READ_TIMEOUT=600) or set_timeout().
+
+Usage (latency saved per call against a local stand-in server):
+    python bench_clients.py --calls 200
+"""
+
+import os
+import threading
+from typing import Tuple
+
+try:
+    import boto3
+    from botocore.config import Config
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+# Connections kept open per host; enough for every concurrent video in flight
+POOL_SIZE = 16
+
+# Attempts (including the first) for throttled or failed Bedrock calls
+BEDROCK_MAX_ATTEMPTS = 3
+
+CONNECT_TIMEOUT = 10
+# Read timeouts cover the whole model round trip; Pegasus on a long clip is slow
+TIMEOUTS = {
+    "bedrock": (CONNECT_TIMEOUT, 300),
+    "openrouter": (CONNECT_TIMEOUT, 60),
+    "backboard": (CONNECT_TIMEOUT, 120),
+}
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, 60)
+
+_lock = threading.Lock()
+_bedrock_clients = {}
+_sessions = {}
+
+
+def timeout(service: str) -> Tuple[float, float]:
+    """(connect, read) timeout for a service, honouring <SERVICE>_READ_TIMEOUT."""
+    connect, read = TIMEOUTS.get(service, DEFAULT_TIMEOUT)
+    override = os.getenv(f"{service.upper()}_READ_TIMEOUT")
+    return connect, float(override) if override else read
+
+
+def set_timeout(service: str, connect: float = None, read: float = None) -> None:
+    """Changes a service's timeouts.
+
+    post()/get() look the timeout up on every request, so pooled sessions
+    use the new values straight away. A Bedrock client has its timeouts
+    fixed in its botocore Config, so only clients created afterwards pick
+    them up; call close_clients() to make bedrock_client() build new ones.
+    """
+    old_connect, old_read = TIMEOUTS.get(service, DEFAULT_TIMEOUT)
+    TIMEOUTS[service] = (connect or old_connect, read or old_read)
+
+
+def bedrock_client(region: str):
+    """Cached bedrock-runtime client for a region."""
+    if not BOTO3_AVAILABLE:
+        raise ValueError("boto3 is required for Bedrock. Install with: pip install boto3")
+    client = _bedrock_clients.get(region)
+    if client is not None:
+        return client
+    with _lock:
+        if region not in _bedrock_clients:
+            connect, read = timeout("bedrock")
+            config = Config(
+                connect_timeout=connect,
+                read_timeout=read,
+                max_pool_connections=POOL_SIZE,
+                retries={"max_attempts": BEDROCK_MAX_ATTEMPTS, "mode": "standard"},
+                tcp_keepalive=True,
+            )
+            # boto3.client() goes through a shared default session that isn't
+            # thread-safe to create clients from; a dedicated one is
+            _bedrock_clients[region] = boto3.session.Session().client(
+                "bedrock-runtime", region_name=region, config=config
+            )
+        return _bedrock_clients[region]
+
+
+def session(service: str):
+    """Pooled keep-alive requests.Session for a service."""
+    if not REQUESTS_AVAILABLE:
+        raise ValueError("requests library is required. Install with: pip install requests")
+    s = _sessions.get(service)
+    if s is not None:
+        return s
+    with _lock:
+        if service not in _sessions:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[service] = s
+        return _sessions[service]
+
+
+def request(service: str, method: str, url: str, **kwargs):
+    """Sends a request on the service's pooled session with its timeout by default."""
+    kwargs.setdefault("timeout", timeout(service))
+    return session(service).request(method, url, **kwargs)
+
+
+def post(service: str, url: str, **kwargs):
+    return request(service, "POST", url, **kwargs)
+
+
+def get(service: str, url: str, **kwargs):
+    return request(service, "GET", url, **kwargs)
+
+
+def close_clients() -> None:
+    """Closes every pooled session and forgets the cached clients."""
+    with _lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+        for client in _bedrock_clients.values():
+            client.close()
+        _bedrock_clients.clear()
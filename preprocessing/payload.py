@@ -0,0 +1,189 @@
+"""
+Encode-once video payloads for Bedrock requests.
+
+Pegasus takes the video inline as base64, and process_video sends the same
+video with every prompt. VideoPayload reads and encodes the file once, in
+chunks, into a single ASCII buffer that every call for that video shares,
+and drops the buffer when the last user is done with it. Request bodies are
+streams over that buffer (BodyStream), so concurrent calls don't each hold
+a copy of the video.
+
+Usage:
+    with VideoPayload("clip.mov") as payload:
+        body = payload.request_body("Describe the video")
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+
+# Read size for streaming the encode; a multiple of 3 so no chunk but the
+# last produces base64 padding and the chunks concatenate cleanly
+CHUNK_SIZE = 3 * 1024 * 1024
+
+# Above this size Bedrock wants the video in S3 rather than inline
+MAX_INLINE_MB = 36
+
+
+class BodyStream(io.RawIOBase):
+    """
+    Seekable read-only stream over a sequence of buffers, without joining them.
+
+    botocore sizes file-like bodies with seek()/tell(), hashes them for
+    signing and rewinds them for retries, all of which this supports.
+    """
+
+    def __init__(self, parts):
+        self._parts = [memoryview(part).cast("B") for part in parts]
+        self._size = sum(len(part) for part in self._parts)
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        out = memoryview(buffer).cast("B")
+        written = 0
+        start = 0
+        for part in self._parts:
+            end = start + len(part)
+            if written < len(out) and self._pos < end:
+                offset = max(self._pos - start, 0)
+                n = min(len(part) - offset, len(out) - written)
+                out[written:written + n] = part[offset:offset + n]
+                written += n
+                self._pos += n
+            start = end
+        return written
+
+    def read(self, size: int = -1) -> bytes:
+        # RawIOBase.read() with no size goes through readall(); one allocation is enough
+        if size is None or size < 0:
+            size = self._size - self._pos
+        buffer = bytearray(max(0, min(size, self._size - self._pos)))
+        n = self.readinto(buffer)
+        return bytes(buffer[:n]) if n < len(buffer) else bytes(buffer)
+
+    def close(self) -> None:
+        self._parts = []
+        super().close()
+
+
+class VideoPayload:
+    """
+    Lazily base64-encoded contents of a video file.
+
+    The file is read and encoded on first use, under a lock so concurrent
+    callers encode it once. Used as a context manager (or with
+    acquire()/release()), the encoded buffer is freed when the last holder
+    releases it.
+    """
+
+    def __init__(self, file_path: str):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Video file not found: {file_path}")
+        if not os.path.isfile(file_path):
+            raise ValueError(f"Path is not a file: {file_path}")
+        self.file_path = file_path
+        self.size = os.path.getsize(file_path)
+        self._encoded = None
+        self._digest = None
+        self._lock = threading.Lock()
+        self._holders = 0
+
+    def acquire(self) -> "VideoPayload":
+        with self._lock:
+            self._holders += 1
+        return self
+
+    def release(self) -> None:
+        with self._lock:
+            self._holders -= 1
+            if self._holders <= 0:
+                self._holders = 0
+                self._encoded = None
+
+    def __enter__(self) -> "VideoPayload":
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.release()
+        return False
+
+    def _encode(self) -> bytearray:
+        size_mb = self.size / (1024 * 1024)
+        if size_mb > MAX_INLINE_MB:
+            print(f"Warning: File size ({size_mb:.2f} MB) exceeds recommended base64 limit ({MAX_INLINE_MB} MB). "
+                  f"Consider using S3 for larger files.", file=sys.stderr)
+
+        encoded = bytearray(4 * ((self.size + 2) // 3))
+        chunk = bytearray(CHUNK_SIZE)
+        view = memoryview(chunk)
+        pos = 0
+        try:
+            with open(self.file_path, "rb") as f:
+                while True:
+                    # Fill the whole chunk so only the final one can be short
+                    n = 0
+                    while n < CHUNK_SIZE:
+                        got = f.readinto(view[n:])
+                        if not got:
+                            break
+                        n += got
+                    if not n:
+                        break
+                    out = base64.b64encode(view[:n])
+                    encoded[pos:pos + len(out)] = out
+                    pos += len(out)
+                    if n < CHUNK_SIZE:
+                        break
+        except IOError as e:
+            raise IOError(f"Error reading file {self.file_path}: {e}")
+        # The file may have changed size since __init__
+        del encoded[pos:]
+        return encoded
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the file's contents, computed once; doesn't need the encoded copy."""
+        with self._lock:
+            if self._digest is None:
+                h = hashlib.sha256()
+                with open(self.file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        h.update(chunk)
+                self._digest = h.hexdigest()
+            return self._digest
+
+    @property
+    def encoded(self) -> bytearray:
+        """The base64 encoding of the file as ASCII bytes."""
+        with self._lock:
+            if self._encoded is None:
+                self._encoded = self._encode()
+            return self._encoded
+
+    def request_body(self, prompt: str) -> BodyStream:
+        """Bedrock invoke_model body for a Pegasus prompt on this video."""
+        # Spliced rather than json.dumps'd, which would copy the video into a
+        # str first; the stream reads the shared buffer in place
+        prefix = b'{"inputPrompt": ' + json.dumps(prompt).encode("utf-8") + b', "mediaSource": {"base64String": "'
+        return BodyStream([prefix, self.encoded, b'"}}'])
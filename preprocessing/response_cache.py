@@ -0,0 +1,168 @@
+"""
+On-disk cache for model responses.
+
+Pegasus and Gemini calls take seconds and cost money, and re-running
+process_video on the same clip with the same prompt gets the same answer.
+Responses are stored under the SHA-256 of everything that determines them:
+the input's content hash (video or frame bytes, not its path), the prompt
+text, the model id and any request parameters.
+
+Each entry is one JSON file <root>/<key[:2]>/<key>.json holding the
+response and when it was fetched. Entries older than the TTL count as
+misses and are deleted; hits bump the file's mtime, and the least recently
+used entries are evicted once the cache grows past its size cap. Only
+successful responses are stored.
+
+Set RESPONSE_CACHE_DIR to move the cache, RESPONSE_CACHE_TTL (seconds) to
+change how long answers stay fresh, and RESPONSE_CACHE=off to bypass it.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_DIR = Path(os.getenv("RESPONSE_CACHE_DIR", Path.home() / ".cache" / "project-ph" / "responses"))
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_MB = 256
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "on").lower() not in ("0", "off", "false", "no")
+
+# Bump when a code change alters what gets stored for the same request
+CACHE_VERSION = 1
+
+
+def response_key(**material: Any) -> str:
+    """Key for a JSON-serializable description of a request."""
+    material = {"version": CACHE_VERSION, **material}
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    TTL- and size-bounded LRU cache of JSON responses on disk.
+
+    get() and put() are safe to call from several threads (the
+    process_video branches) and several processes; counters are per
+    instance.
+    """
+
+    def __init__(
+        self,
+        root: Path = CACHE_DIR,
+        ttl_seconds: float = CACHE_TTL,
+        max_bytes: int = CACHE_MAX_MB * 1024 * 1024,
+        enabled: bool = CACHE_ENABLED
+    ):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached response for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._entry(key)
+        try:
+            data = json.loads(entry.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        if self.ttl_seconds and time.time() - data.get("created", 0) > self.ttl_seconds:
+            entry.unlink(missing_ok=True)
+            self._count("expired")
+            self._count("misses")
+            return None
+        try:
+            # Mark as recently used for eviction
+            os.utime(entry)
+        except OSError:
+            pass
+        self._count("hits")
+        return data["response"]
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Stores a response, then evicts down to the size cap."""
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Write a temp file and rename, so readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "response": response}, f)
+            os.replace(tmp, entry)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._count("stores")
+        self.evict()
+
+    def entries(self):
+        """(mtime, bytes, path) for every entry, oldest first."""
+        found = []
+        for entry in self.root.glob("??/*.json"):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, stat.st_size, entry))
+        return sorted(found)
+
+    def evict(self) -> None:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, entry in entries:
+            # mtime is at least the entry's creation time, so this only
+            # drops entries that are certainly stale
+            stale = self.ttl_seconds and now - mtime > self.ttl_seconds
+            if total <= self.max_bytes and not stale:
+                continue
+            entry.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, entry in self.entries():
+            entry.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "stores": self.stores,
+        }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResponseCache:
+    """The process-wide cache used by script.py."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResponseCache()
+        return _default
@@ -10,23 +10,33 @@ Prerequisites:
 - AWS credentials configured (via AWS CLI, environment variables, or IAM role)
 - Access to TwelveLabs Pegasus model in Bedrock (e.g., us.twelvelabs.pegasus-1-2-v1:0)
 - boto3 installed
-- Python 3.7+
+- Python 3.9+
 
 Usage:
     python script.py --video-path path/to/video.mp4 --region us-east-1 --model-id us.twelvelabs.pegasus-1-2-v1:0
+
+Batches (from Python; results arrive as each video finishes):
+    async for video_path, result in process_videos(paths, max_concurrency=8):
+        ...
 """
 
 import argparse
+import asyncio
 import os
 import sys
 import json
 import base64
+import hashlib
 import time
-from typing import Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Iterable, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError, BotoCoreError
 
+import clients
+from payload import VideoPayload
+from response_cache import default_cache, response_key
+
 try:
     import requests
     REQUESTS_AVAILABLE = True
@@ -41,6 +51,9 @@ except ImportError:
     CV2_AVAILABLE = False
     print("Warning: OpenCV (cv2) not available. Frame extraction will not work.", file=sys.stderr)
 
+# The pluggable decoders (PyAV, ffmpeg pipe, OpenCV) live with the tracker in ../backend
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
 # Try to load python-dotenv if available for .env file support
 try:
     from dotenv import load_dotenv
@@ -51,6 +64,12 @@ try:
 except ImportError:
     pass
 
+# process_video branches (locateMain -> coordinates, describe) run at the same time
+MAX_WORKERS = 2
+
+# Videos process_videos keeps in flight at once
+MAX_CONCURRENCY = 4
+
 
 def load_prompt_from_file(prompt_file: str) -> Optional[str]:
     """
@@ -75,12 +94,30 @@ def load_prompt_from_file(prompt_file: str) -> Optional[str]:
 locate_main_prompt = load_prompt_from_file("locateMain.txt")
 describe_prompt = load_prompt_from_file("describe.txt")
 
-def extract_first_frame_as_base64(video_path: str) -> Tuple[str, int, int]:
+def load_open_decoder():
+    """
+    Imports backend/decoders.py on first use and returns its open_decoder, or None.
+    
+    backend/ is appended to sys.path rather than prepended, so its modules
+    never shadow installed packages of the same name.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.append(BACKEND_DIR)
+    try:
+        from decoders import open_decoder
+    except ImportError:
+        return None
+    return open_decoder
+
+
+def extract_first_frame_as_base64(video_path: str, decoder: str = "auto") -> Tuple[str, int, int]:
     """
     Extracts the first frame from a video file and returns it as a base64-encoded JPEG image.
     
     Args:
         video_path: Path to the video file
+        decoder: Decoder backend from backend/decoders.py ("auto", "pyav", "ffmpeg" or "opencv");
+                 falls back to cv2.VideoCapture if the decoders module can't be imported
         
     Returns:
         Tuple of (base64_encoded_image, width, height)
@@ -91,15 +128,28 @@ def extract_first_frame_as_base64(video_path: str) -> Tuple[str, int, int]:
     if not CV2_AVAILABLE:
         raise ValueError("OpenCV (cv2) is required for frame extraction. Install with: pip install opencv-python")
     
-    cap = cv2.VideoCapture(video_path)
-    
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_path}")
-    
-    ret, frame = cap.read()
-    cap.release()
+    open_decoder = load_open_decoder()
+    if open_decoder is not None:
+        try:
+            with open_decoder(video_path, decoder) as video:
+                frame = video.read()
+        except ValueError:
+            raise
+        except Exception as e:
+            # PyAV raises its own error types, the ffmpeg pipe OSError
+            raise ValueError(f"Could not open video file: {video_path} ({e})")
+    else:
+        cap = cv2.VideoCapture(video_path)
+        
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        
+        ret, frame = cap.read()
+        cap.release()
+        if not ret:
+            frame = None
     
-    if not ret or frame is None:
+    if frame is None:
         raise ValueError(f"Could not read first frame from video: {video_path}")
     
     # Get frame dimensions
@@ -128,41 +178,30 @@ def read_file_as_base64(file_path: str) -> str:
         FileNotFoundError: If the file doesn't exist
         IOError: If the file cannot be read
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Video file not found: {file_path}")
-    
-    if not os.path.isfile(file_path):
-        raise ValueError(f"Path is not a file: {file_path}")
-    
-    try:
-        with open(file_path, "rb") as f:
-            data = f.read()
-        
-        # Check file size (base64 limit is ~36 MB)
-        file_size_mb = len(data) / (1024 * 1024)
-        if file_size_mb > 36:
-            print(f"Warning: File size ({file_size_mb:.2f} MB) exceeds recommended base64 limit (36 MB). "
-                  f"Consider using S3 for larger files.", file=sys.stderr)
-        
-        return base64.b64encode(data).decode("utf-8")
-    except IOError as e:
-        raise IOError(f"Error reading file {file_path}: {e}")
+    return VideoPayload(file_path).encoded.decode("ascii")
 
 
 def invoke_twelvelabs_api(
     video_path: str,
     prompt: str,
     region: str,
-    model_id: str
+    model_id: str,
+    payload: Optional[VideoPayload] = None,
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """
     Invokes TwelveLabs Pegasus API via Amazon Bedrock to process a video with a prompt.
     
+    Responses are cached on disk by video content, prompt and model (see
+    response_cache.py); use_cache=False bypasses the cache.
+    
     Args:
         video_path: Path to the local video file
         prompt: Prompt to guide the video processing
         region: AWS region for Bedrock
         model_id: Model ID for TwelveLabs Pegasus (e.g., us.twelvelabs.pegasus-1-2-v1:0)
+        payload: Already-encoded video to reuse across calls (default: encode video_path for this call)
+        use_cache: Whether to read and store cached responses (default: True)
         
     Returns:
         Response dictionary from the Bedrock API
@@ -170,19 +209,27 @@ def invoke_twelvelabs_api(
     Raises:
         ClientError: For AWS API errors
     """
-    bedrock = boto3.client("bedrock-runtime", region_name=region)
-    
     try:
-        b64_content = read_file_as_base64(video_path)
+        payload = payload or VideoPayload(video_path)
+        # Hashing is much cheaper than encoding, so check the cache first
+        cache_key = response_key(api="bedrock", video=payload.digest, prompt=prompt, model=model_id) \
+            if use_cache else None
     except (FileNotFoundError, IOError, ValueError) as e:
         raise ValueError(f"Failed to read video file: {e}")
     
-    request_body = {
-        "inputPrompt": prompt,
-        "mediaSource": {
-            "base64String": b64_content
-        }
-    }
+    cache = default_cache()
+    if cache_key:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"Using cached Pegasus response", file=sys.stderr)
+            return cached
+    
+    bedrock = clients.bedrock_client(region)
+    
+    try:
+        request_body = payload.request_body(prompt)
+    except (FileNotFoundError, IOError, ValueError) as e:
+        raise ValueError(f"Failed to read video file: {e}")
     
     try:
         # Start timer for API call
@@ -190,7 +237,7 @@ def invoke_twelvelabs_api(
         
         response = bedrock.invoke_model(
             modelId=model_id,
-            body=json.dumps(request_body),
+            body=request_body,
             contentType="application/json",
             accept="application/json"
         )
@@ -209,6 +256,8 @@ def invoke_twelvelabs_api(
         
         print(f"API call completed in {duration:.2f} seconds", file=sys.stderr)
         
+        if cache_key:
+            cache.put(cache_key, response_body)
         return response_body
         
     except ClientError as e:
@@ -269,7 +318,7 @@ def invoke_gemini_api_with_image(
     Raises:
         ClientError: For AWS API errors
     """
-    bedrock = boto3.client("bedrock-runtime", region_name=region)
+    bedrock = clients.bedrock_client(region)
     
     # Gemma models in Bedrock use "messages" format
     # Content array contains objects with "text" for text and "image" for images
@@ -333,17 +382,20 @@ def invoke_gemini_api_with_image(
 def invoke_gemini_via_openrouter(
     image_base64: str,
     prompt_text: str,
-    model_id: str = "google/gemini-3-flash-preview"
+    model_id: str = "google/gemini-3-flash-preview",
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """
     Invokes Gemini API via OpenRouter to analyze an image with a text prompt.
     Uses the exact format from OpenRouter documentation.
     Automatically switches to alternative models if rate-limited.
+    Responses are cached on disk by image, prompt and model (see response_cache.py).
     
     Args:
         image_base64: Base64-encoded JPEG image (without data URL prefix)
         prompt_text: Text prompt to guide the analysis
         model_id: Gemini model ID on OpenRouter (default: google/gemini-3-flash-preview)
+        use_cache: Whether to read and store cached responses (default: True)
         
     Returns:
         Response dictionary compatible with extract_coordinates_from_gemini_response
@@ -374,6 +426,14 @@ def invoke_gemini_via_openrouter(
     except Exception as e:
         raise ValueError(f"Invalid base64 image data: {e}")
     
+    cache = default_cache()
+    image_digest = hashlib.sha256(image_base64_clean.encode("ascii")).hexdigest()
+    if use_cache:
+        cached = cache.get(response_key(api="openrouter", image=image_digest, prompt=prompt_text, model=model_id))
+        if cached is not None:
+            print(f"Using cached OpenRouter Gemini response", file=sys.stderr)
+            return cached
+    
     # Format exactly as shown in OpenRouter docs: data:image/jpeg;base64,{base64}
     data_url = f"data:image/jpeg;base64,{image_base64_clean}"
     
@@ -425,7 +485,7 @@ def invoke_gemini_via_openrouter(
             }
             
             try:
-                response = requests.post(url, headers=headers, json=payload, timeout=60)
+                response = clients.post("openrouter", url, headers=headers, json=payload)
                 
                 # If successful, break out of loop
                 if response.ok:
@@ -528,6 +588,11 @@ def invoke_gemini_via_openrouter(
         
         print(f"OpenRouter Gemini API call completed in {duration:.2f} seconds", file=sys.stderr)
         
+        if use_cache:
+            # Keyed by the model that actually answered, so a fallback's answer
+            # is never served later as if model_id had given it
+            cache.put(response_key(api="openrouter", image=image_digest, prompt=prompt_text, model=attempt_model),
+                      transformed_response)
         return transformed_response
     
     except requests.exceptions.RequestException as e:
@@ -680,9 +745,135 @@ Examples:
         help="Model ID for image analysis via OpenRouter (default: google/gemini-2.0-flash-exp:free). Can also be set via GEMINI_MODEL_ID environment variable."
     )
     
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=MAX_WORKERS,
+        help=f"Prompts processed at the same time; 1 runs them in sequence (default: {MAX_WORKERS})"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Call the models even if a cached response exists, and don't store new ones"
+    )
+    
     return parser.parse_args()
 
 
+def locate_main_branch(
+    video_path: str,
+    prompt: str,
+    region: str,
+    model_id: str,
+    gemini_model_id: str,
+    extract_coordinates: bool,
+    raw_output: bool,
+    payload: Optional[VideoPayload] = None,
+    use_cache: bool = True,
+    subject: str = "main character",
+    verbose: bool = False
+) -> Dict[str, Any]:
+    """
+    Runs the locateMain Pegasus call and, from its description, the Gemini coordinate call.
+    
+    The coordinate step needs the locateMain description, so the two calls
+    are chained; errors in the coordinate step are reported in
+    results["coordinates"] rather than raised. subject names the person in
+    the Gemini prompt; verbose prints progress to stderr.
+    
+    Returns:
+        Dictionary with "locateMain" and, if extracted, "coordinates"
+    """
+    results = {}
+    if verbose:
+        print(f"Processing video with locateMain prompt...", file=sys.stderr)
+    response = invoke_twelvelabs_api(
+        video_path=video_path,
+        prompt=prompt,
+        region=region,
+        model_id=model_id,
+        payload=payload,
+        use_cache=use_cache
+    )
+    
+    if raw_output:
+        results["locateMain"] = response
+        return results
+    
+    locate_main_description = extract_description(response)
+    results["locateMain"] = locate_main_description
+    
+    # Extract first frame and get coordinates using Gemini
+    if locate_main_description and extract_coordinates and CV2_AVAILABLE:
+        try:
+            if verbose:
+                print(f"Extracting first frame from video...", file=sys.stderr)
+            frame_base64, frame_width, frame_height = extract_first_frame_as_base64(video_path)
+            
+            # Create prompt for Gemini to find coordinates
+            gemini_prompt = f"""Based on this description of the {subject}: "{locate_main_description}"
+
+Please identify the {subject} in this image and provide their X and Y coordinates in JSON format: {{"x": <number>, "y": <number>}}.
+
+Coordinates should be pixel positions where (0, 0) is the top-left corner. X increases to the right, Y increases downward.
+
+Provide only the JSON with x and y coordinates."""
+            
+            if verbose:
+                print(f"Analyzing first frame with Gemini via OpenRouter to find coordinates...", file=sys.stderr)
+            gemini_response = invoke_gemini_via_openrouter(
+                image_base64=frame_base64,
+                prompt_text=gemini_prompt,
+                model_id=gemini_model_id,
+                use_cache=use_cache
+            )
+            
+            coords = extract_coordinates_from_gemini_response(gemini_response)
+            if coords:
+                results["coordinates"] = coords
+                results["coordinates"]["image_width"] = frame_width
+                results["coordinates"]["image_height"] = frame_height
+            else:
+                # Fallback: include raw text response
+                results["coordinates"] = {"error": "Could not extract coordinates", "raw_response": gemini_response}
+        except Exception as e:
+            if verbose:
+                print(f"Warning: Could not extract coordinates using Gemini: {e}", file=sys.stderr)
+            results["coordinates"] = {"error": str(e)}
+    
+    return results
+
+
+def describe_branch(
+    video_path: str,
+    prompt: str,
+    region: str,
+    model_id: str,
+    raw_output: bool,
+    payload: Optional[VideoPayload] = None,
+    use_cache: bool = True,
+    verbose: bool = False
+) -> Dict[str, Any]:
+    """
+    Runs the describe Pegasus call.
+    
+    Returns:
+        Dictionary with "describe"
+    """
+    if verbose:
+        print(f"Processing video with describe prompt...", file=sys.stderr)
+    response = invoke_twelvelabs_api(
+        video_path=video_path,
+        prompt=prompt,
+        region=region,
+        model_id=model_id,
+        payload=payload,
+        use_cache=use_cache
+    )
+    return {"describe": response if raw_output else extract_description(response)}
+
+
 def process_video(
     video_path: str,
     locate_main_prompt: Optional[str] = None,
@@ -691,13 +882,21 @@ def process_video(
     twelvelabs_model_id: str = None,
     gemini_model_id: str = "google/gemini-2.0-flash-exp:free",
     extract_coordinates: bool = False,
-    raw_output: bool = False
+    raw_output: bool = False,
+    max_workers: int = MAX_WORKERS,
+    use_cache: bool = True,
+    subject: str = "main character",
+    verbose: bool = False
 ) -> Dict[str, Any]:
     """
     High-level function to process a video with locateMain and describe prompts.
     
     This function abstracts the video processing logic and can be imported from other modules.
     
+    The describe call doesn't depend on locateMain, so it runs on a thread
+    pool alongside the locateMain -> coordinates chain and the wall time is
+    roughly the slower of the two rather than their sum.
+    
     Args:
         video_path: Path to the video file
         locate_main_prompt: Prompt text for locating the main character (if None, loads from locateMain.txt)
@@ -707,17 +906,22 @@ def process_video(
         gemini_model_id: Gemini model ID for image analysis (default: google/gemini-2.0-flash-exp:free)
         extract_coordinates: Whether to extract coordinates using Gemini (default: True)
         raw_output: Whether to return raw API responses (default: False)
+        max_workers: Branches run at the same time; 1 runs them one after the other (default: 2)
+        use_cache: Whether to reuse cached model responses (default: True; see response_cache.py)
+        subject: How the Gemini coordinate prompt refers to the person (default: "main character")
+        verbose: Whether to print per-step progress to stderr (default: False)
         
     Returns:
         Dictionary with keys:
         - "locateMain": Description of the main character (or raw response if raw_output=True)
         - "coordinates": Dictionary with x, y coordinates and image dimensions (if extract_coordinates=True)
         - "describe": Video description (if describe_prompt provided)
+        A branch that fails while another succeeds has {"error": ...} under its key instead.
         
     Raises:
         FileNotFoundError: If video file doesn't exist
         ValueError: If prompts can't be loaded or required args missing
-        ClientError: For AWS API errors
+        ClientError: For AWS API errors (only if every branch fails)
     """
     # Validate video path
     if not os.path.exists(video_path):
@@ -744,73 +948,116 @@ def process_video(
     if not locate_main_prompt and not describe_prompt:
         raise ValueError("Neither locate_main_prompt nor describe_prompt provided, and prompt files not found")
     
-    results = {}
-    locate_main_description = None
-    
-    # Process with locateMain prompt if available
+    # (result key, function, kwargs) per independent branch
+    branches = []
     if locate_main_prompt:
-        response = invoke_twelvelabs_api(
-            video_path=video_path,
-            prompt=locate_main_prompt,
-            region=region,
-            model_id=twelvelabs_model_id
-        )
-        
-        if raw_output:
-            results["locateMain"] = response
-        else:
-            locate_main_description = extract_description(response)
-            results["locateMain"] = locate_main_description
-            
-            # Extract first frame and get coordinates using Gemini
-            if locate_main_description and extract_coordinates and CV2_AVAILABLE:
+        branches.append(("locateMain", locate_main_branch, {
+            "video_path": video_path,
+            "prompt": locate_main_prompt,
+            "region": region,
+            "model_id": twelvelabs_model_id,
+            "gemini_model_id": gemini_model_id,
+            "extract_coordinates": extract_coordinates,
+            "subject": subject,
+            "raw_output": raw_output,
+            "use_cache": use_cache,
+            "verbose": verbose,
+        }))
+    if describe_prompt:
+        branches.append(("describe", describe_branch, {
+            "video_path": video_path,
+            "prompt": describe_prompt,
+            "region": region,
+            "model_id": twelvelabs_model_id,
+            "raw_output": raw_output,
+            "use_cache": use_cache,
+            "verbose": verbose,
+        }))
+    
+    outcomes = {}
+    # Every Pegasus call for this video shares one encoded copy, freed on exit
+    with VideoPayload(video_path) as payload:
+        for _, _, kwargs in branches:
+            kwargs["payload"] = payload
+        if max_workers <= 1 or len(branches) == 1:
+            for key, fn, kwargs in branches:
                 try:
-                    frame_base64, frame_width, frame_height = extract_first_frame_as_base64(video_path)
-                    
-                    # Create prompt for Gemini to find coordinates
-                    gemini_prompt = f"""Based on this description of the main character: "{locate_main_description}"
-
-Please identify the main character in this image and provide their X and Y coordinates in JSON format: {{"x": <number>, "y": <number>}}.
+                    outcomes[key] = fn(**kwargs)
+                except Exception as e:
+                    outcomes[key] = e
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(branches))) as pool:
+                futures = {key: pool.submit(fn, **kwargs) for key, fn, kwargs in branches}
+                for key, future in futures.items():
+                    try:
+                        outcomes[key] = future.result()
+                    except Exception as e:
+                        outcomes[key] = e
+    
+    errors = [outcome for outcome in outcomes.values() if isinstance(outcome, Exception)]
+    if len(errors) == len(outcomes):
+        # Nothing to return; surface the first failure as before
+        raise errors[0]
+    
+    results = {}
+    for key, _, _ in branches:
+        outcome = outcomes[key]
+        if isinstance(outcome, Exception):
+            print(f"Warning: {key} failed: {outcome}", file=sys.stderr)
+            results[key] = {"error": str(outcome)}
+        else:
+            results.update(outcome)
+    return results
 
-Coordinates should be pixel positions where (0, 0) is the top-left corner. X increases to the right, Y increases downward.
 
-Provide only the JSON with x and y coordinates."""
-                    
-                    gemini_response = invoke_gemini_via_openrouter(
-                        image_base64=frame_base64,
-                        prompt_text=gemini_prompt,
-                        model_id=gemini_model_id
-                    )
-                    
-                    if raw_output:
-                        results["coordinates"] = gemini_response
-                    else:
-                        coords = extract_coordinates_from_gemini_response(gemini_response)
-                        if coords:
-                            results["coordinates"] = coords
-                            results["coordinates"]["image_width"] = frame_width
-                            results["coordinates"]["image_height"] = frame_height
-                        else:
-                            # Fallback: include raw text response
-                            results["coordinates"] = {"error": "Could not extract coordinates", "raw_response": gemini_response}
-                except Exception as e:
-                    results["coordinates"] = {"error": str(e)}
+async def process_videos(
+    video_paths: Iterable[str],
+    max_concurrency: int = MAX_CONCURRENCY,
+    **kwargs: Any
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Processes many videos concurrently, yielding each result as it completes.
     
-    # Process with describe prompt if available
-    if describe_prompt:
-        response = invoke_twelvelabs_api(
-            video_path=video_path,
-            prompt=describe_prompt,
-            region=region,
-            model_id=twelvelabs_model_id
-        )
+    boto3 and requests block, so each process_video runs on a thread pool of
+    max_concurrency threads, bridged into asyncio; at most max_concurrency
+    videos are in flight at once. Every video shares the pooled clients and
+    the response cache.
+    
+    Args:
+        video_paths: Paths of the videos to process
+        max_concurrency: Videos processed at the same time (default: 4)
+        **kwargs: Passed to process_video for every video
         
-        if raw_output:
-            results["describe"] = response
-        else:
-            results["describe"] = extract_description(response)
+    Yields:
+        (video_path, result) in completion order; result is process_video's
+        dictionary, or {"error": ...} if the video failed outright
     
-    return results
+    Example:
+        async for video_path, result in process_videos(paths, max_concurrency=8):
+            print(video_path, result)
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="process_videos")
+    
+    async def run(video_path: str) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            try:
+                result = await loop.run_in_executor(executor, lambda: process_video(video_path, **kwargs))
+            except Exception as e:
+                print(f"Warning: {video_path} failed: {e}", file=sys.stderr)
+                result = {"error": str(e)}
+            return video_path, result
+    
+    tasks = [asyncio.ensure_future(run(video_path)) for video_path in video_paths]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The caller may stop early; don't start videos nobody will read
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def validate_arguments(args: argparse.Namespace) -> None:
@@ -837,77 +1084,24 @@ def main() -> int:
             print("Error: Neither locateMain.txt nor describe.txt could be loaded.", file=sys.stderr)
             return 1
         
-        results = {}
-        locate_main_description = None
-        
-        # Process with locateMain prompt if available
-        if locate_main_prompt:
-            print(f"Processing video with locateMain prompt...", file=sys.stderr)
-            response = invoke_twelvelabs_api(
-                video_path=args.video_path,
-                prompt=locate_main_prompt,
-                region=args.region,
-                model_id=args.model_id
-            )
-            # response = "The main speaker is the person in the center of the frame."
-            
-            if args.raw_output:
-                results["locateMain"] = response
-            else:
-                locate_main_description = extract_description(response)
-                results["locateMain"] = locate_main_description
-                
-                # Extract first frame and get coordinates using Gemini
-                if locate_main_description and CV2_AVAILABLE:
-                    try:
-                        print(f"Extracting first frame from video...", file=sys.stderr)
-                        frame_base64, frame_width, frame_height = extract_first_frame_as_base64(args.video_path)
-                        
-                        # Create prompt for Gemini to find coordinates
-                        gemini_prompt = f"""Based on this description of the main speaker: "{locate_main_description}"
-
-Please identify the main speaker in this image and provide their X and Y coordinates in JSON format: {{"x": <number>, "y": <number>}}.
-
-Coordinates should be pixel positions where (0, 0) is the top-left corner. X increases to the right, Y increases downward.
-
-Provide only the JSON with x and y coordinates."""
-                        
-                        print(f"Analyzing first frame with Gemini via OpenRouter to find coordinates...", file=sys.stderr)
-                        gemini_response = invoke_gemini_via_openrouter(
-                            image_base64=frame_base64,
-                            prompt_text=gemini_prompt,
-                            model_id=args.gemini_model_id
-                        )
-                        
-                        if args.raw_output:
-                            results["coordinates"] = gemini_response
-                        else:
-                            coords = extract_coordinates_from_gemini_response(gemini_response)
-                            if coords:
-                                results["coordinates"] = coords
-                                results["coordinates"]["image_width"] = frame_width
-                                results["coordinates"]["image_height"] = frame_height
-                            else:
-                                # Fallback: include raw text response
-                                results["coordinates"] = {"error": "Could not extract coordinates", "raw_response": gemini_response}
-                    except Exception as e:
-                        print(f"Warning: Could not extract coordinates using Gemini: {e}", file=sys.stderr)
-                        results["coordinates"] = {"error": str(e)}
-        
-        # Process with describe prompt if available
-        if describe_prompt:
-            print(f"Processing video with describe prompt...", file=sys.stderr)
-            response = invoke_twelvelabs_api(
-                video_path=args.video_path,
-                prompt=describe_prompt,
-                region=args.region,
-                model_id=args.model_id
-            )
-            
-            if args.raw_output:
-                results["describe"] = response
-            else:
-                results["describe"] = extract_description(response)
+        results = process_video(
+            video_path=args.video_path,
+            locate_main_prompt=locate_main_prompt or "",
+            describe_prompt=describe_prompt or "",
+            region=args.region,
+            twelvelabs_model_id=args.model_id,
+            gemini_model_id=args.gemini_model_id,
+            extract_coordinates=True,
+            raw_output=args.raw_output,
+            max_workers=args.max_workers,
+            use_cache=not args.no_cache,
+            subject="main speaker",
+            verbose=True
+        )
+        
+        cache_stats = default_cache().stats()
+        if not args.no_cache and cache_stats["enabled"]:
+            print(f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses", file=sys.stderr)
         
         # Output results as JSON
         print(json.dumps(results, indent=2))
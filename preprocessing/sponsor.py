@@ -3,8 +3,9 @@ Sponsor module - loads BACKBOARD_API_KEY from environment variables
 """
 
 import os
-import requests
-from script import process_video
+import asyncio
+import clients
+from script import process_video, process_videos
 import glob
 import json
 
@@ -22,9 +23,12 @@ except ImportError:
 BACKBOARD_API_KEY = os.getenv('BACKBOARD_API_KEY')
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
 
+# Training videos processed at the same time while warming the response cache
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '4'))
+
 def createAssistant():
 
-    create = requests.post("https://app.backboard.io/api/assistants",
+    create = clients.post("backboard", "https://app.backboard.io/api/assistants",
         headers={
           "Content-Type": "application/json",
           "X-API-Key": BACKBOARD_API_KEY
@@ -150,7 +154,8 @@ def createAssistant():
     return assistant_id
 
 def createThread(assistant_id):
-    create_thread = requests.post(
+    create_thread = clients.post(
+        "backboard",
         f"https://app.backboard.io/api/assistants/{assistant_id}/threads",
         headers={
           "Content-Type": "application/json",
@@ -163,7 +168,8 @@ def createThread(assistant_id):
     return thread_id
 
 def createMemory(assistant_id, memory_content):
-    response = requests.post(
+    response = clients.post(
+        "backboard",
         f"https://app.backboard.io/api/assistants/{assistant_id}/memories",
         headers={
         "Content-Type": "application/json",
@@ -184,7 +190,8 @@ def createMemory(assistant_id, memory_content):
         return None
 
 def getMemories(assistant_id):
-    memories = requests.get(
+    memories = clients.get(
+        "backboard",
         f"https://app.backboard.io/api/assistants/{assistant_id}/memories",
         headers={
         "X-API-Key": BACKBOARD_API_KEY
@@ -215,7 +222,8 @@ def queryApi(thread_id, message, llm_provider="google", model_name="gemini-2.5-f
     import json
     import time
     
-    response = requests.post(
+    response = clients.post(
+        "backboard",
         f"https://app.backboard.io/api/threads/{thread_id}/messages",
         headers={
           "X-API-Key": BACKBOARD_API_KEY
@@ -275,7 +283,8 @@ def queryApi(thread_id, message, llm_provider="google", model_name="gemini-2.5-f
                     
                     # Submit tool result as a follow-up message to the thread
                     # Backboard might handle tool results as messages with role "tool"
-                    tool_response = requests.post(
+                    tool_response = clients.post(
+                        "backboard",
                         f"https://app.backboard.io/api/threads/{thread_id}/messages",
                         headers={
                             "X-API-Key": BACKBOARD_API_KEY
@@ -297,7 +306,8 @@ def queryApi(thread_id, message, llm_provider="google", model_name="gemini-2.5-f
                             time.sleep(1)
                             
                             # Make another API call asking LLM to format the structured output
-                            format_response = requests.post(
+                            format_response = clients.post(
+                                "backboard",
                                 f"https://app.backboard.io/api/threads/{thread_id}/messages",
                                 headers={
                                     "X-API-Key": BACKBOARD_API_KEY
@@ -334,7 +344,8 @@ def queryApi(thread_id, message, llm_provider="google", model_name="gemini-2.5-f
                         print("Attempting alternative: submit as regular message...")
                         
                         # Alternative: Submit tool result as part of a continuation message
-                        tool_result_message = requests.post(
+                        tool_result_message = clients.post(
+                            "backboard",
                             f"https://app.backboard.io/api/threads/{thread_id}/messages",
                             headers={
                                 "X-API-Key": BACKBOARD_API_KEY
@@ -373,8 +384,24 @@ def queryApi(thread_id, message, llm_provider="google", model_name="gemini-2.5-f
             print(f"Response: {response.text}")
             return error_msg
 
+async def prefetchVideos(video_paths, max_concurrency=PREFETCH_CONCURRENCY):
+    """
+    Runs process_video over every video concurrently so the responses are cached.
+    
+    Uses the same arguments the assistant's tool call does (tool default
+    extract_coordinates=True), so those calls then hit the response cache.
+    """
+    done = 0
+    async for video_path, result in process_videos(video_paths, max_concurrency, extract_coordinates=True):
+        done += 1
+        status = f"error: {result['error']}" if "error" in result else "ok"
+        print(f"Prefetched {video_path} ({done}/{len(video_paths)}): {status}")
+
 def trainAssistant(assistant_id):
     video_paths = glob.glob("training_videos/*.mov")
+    # The assistant thread takes one message at a time, but the slow model
+    # calls behind each one can all happen up front
+    asyncio.run(prefetchVideos(video_paths))
     for video_path in video_paths:
         result = queryApi(thread_id, f"Please process the video at {video_path} and identify the main character.")
         createMemory(assistant_id, result)
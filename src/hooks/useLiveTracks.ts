@@ -0,0 +1,49 @@
+import { useState, useEffect } from 'react';
+
+// Subscribes to the Server-Sent Events stream from backend/track_live.py and
+// keeps the most recent tracked frame.
+
+interface LiveTrack {
+  id: number;
+  conf: number;
+  bbox: [number, number, number, number]; // [x1, y1, x2, y2]
+}
+
+export interface LiveFrame {
+  frame: number;
+  t: number;
+  tracks: LiveTrack[];
+  latencyMs: number; // capture to publish, measured by the tracker
+}
+
+export interface LiveMeta {
+  videoW: number;
+  videoH: number;
+  fps: number;
+  roi: [number, number, number, number] | null;
+}
+
+export const LIVE_EVENTS_URL = 'http://127.0.0.1:8765/events';
+
+export function useLiveTracks(url: string = LIVE_EVENTS_URL) {
+  const [meta, setMeta] = useState<LiveMeta | null>(null);
+  const [frame, setFrame] = useState<LiveFrame | null>(null);
+  const [connected, setConnected] = useState(false);
+  const [ended, setEnded] = useState(false);
+
+  useEffect(() => {
+    // EventSource reconnects on its own after network errors
+    const source = new EventSource(url);
+    source.onopen = () => setConnected(true);
+    source.onerror = () => setConnected(false);
+    source.addEventListener('meta', (e) => setMeta(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener('frame', (e) => setFrame(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener('end', () => {
+      setEnded(true);
+      source.close();
+    });
+    return () => source.close();
+  }, [url]);
+
+  return { meta, frame, connected, ended };
+}
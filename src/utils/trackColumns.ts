@@ -0,0 +1,155 @@
+// Loader for the columnar .trk tracking format written by backend/track_video.py
+// (--format columnar). Layout is documented in backend/track_format.py; every
+// column is 8-byte aligned, so the typed arrays below are views over the
+// fetched buffer rather than copies.
+
+const MAGIC = 'PHTRK\0';
+const SUPPORTED_VERSION = 1;
+const PREFIX_SIZE = 12;
+
+interface ColumnSpec {
+  dtype: string;
+  offset: number;
+  shape: number[];
+}
+
+export interface Shot {
+  start: number; // first frame
+  end: number; // one past the last frame
+  kind: 'pitch' | 'other';
+  skipped: boolean; // not run through the detector, so no tracks
+}
+
+interface TrackColumnsHeader {
+  videoW: number;
+  videoH: number;
+  fps: number;
+  numFrames: number;
+  numRows: number;
+  shots?: Shot[];
+  bboxScale?: number; // quantized files: fixed-point steps per pixel of bbox_q
+  bboxDelta?: boolean; // bbox_q rows hold the change from the track's previous row
+  columns: Record<string, ColumnSpec>;
+}
+
+export interface TrackColumns {
+  videoW: number;
+  videoH: number;
+  fps: number;
+  numFrames: number;
+  numRows: number;
+  frameOffsets: Uint32Array; // rows of frame i are [frameOffsets[i], frameOffsets[i + 1])
+  t: Float64Array;
+  frame: Uint32Array;
+  id: Int32Array;
+  conf: Float32Array;
+  bbox: Float32Array; // x1, y1, x2, y2 per row, flattened; decoded copies for quantized files
+  flags: Uint8Array | null; // FLAG_* bits per row; null in older files
+  shots: Shot[] | null; // scene-cut shots (track_video.py --scene-cuts); null if not detected
+}
+
+export const FLAG_INTERP = 1; // box interpolated between detector frames
+export const FLAG_FILLED = 2; // gap filled by backend/track_smooth.py
+
+type TypedArray = Uint8Array | Int16Array | Uint16Array | Int32Array | Uint32Array | Float32Array | Float64Array;
+
+const VIEWS: Record<string, (buffer: ArrayBuffer, offset: number, length: number) => TypedArray> = {
+  '|u1': (b, o, n) => new Uint8Array(b, o, n),
+  '<i2': (b, o, n) => new Int16Array(b, o, n),
+  '<u2': (b, o, n) => new Uint16Array(b, o, n),
+  '<i4': (b, o, n) => new Int32Array(b, o, n),
+  '<u4': (b, o, n) => new Uint32Array(b, o, n),
+  '<f4': (b, o, n) => new Float32Array(b, o, n),
+  '<f8': (b, o, n) => new Float64Array(b, o, n),
+};
+
+function isLittleEndian(): boolean {
+  return new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+}
+
+export function readColumn(buffer: ArrayBuffer, spec: ColumnSpec): TypedArray {
+  const view = VIEWS[spec.dtype];
+  if (!view) throw new Error(`Unsupported column dtype ${spec.dtype}`);
+  const length = spec.shape.reduce((a, b) => a * b, 1);
+  return view(buffer, spec.offset, length);
+}
+
+const CONF_SCALE = 255;
+
+// Float bboxes from the int16 bbox_q column (--encoding quantized/delta)
+function decodeBbox(q: Int16Array, id: Int32Array, scale: number, delta: boolean): Float32Array {
+  const bbox = new Float32Array(q.length);
+  // Rows are in frame order, so a running sum per track undoes the deltas
+  const last = new Map<number, Int32Array>();
+  for (let row = 0; row < id.length; row++) {
+    const base = row * 4;
+    let prev = delta ? last.get(id[row]) : undefined;
+    if (delta && !prev) {
+      prev = new Int32Array(4);
+      last.set(id[row], prev);
+    }
+    for (let k = 0; k < 4; k++) {
+      let v = q[base + k];
+      if (prev) {
+        v += prev[k];
+        prev[k] = v;
+      }
+      bbox[base + k] = v / scale;
+    }
+  }
+  return bbox;
+}
+
+export function parseTrackHeader(buffer: ArrayBuffer): TrackColumnsHeader {
+  const prefix = new DataView(buffer, 0, PREFIX_SIZE);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, MAGIC.length));
+  if (magic !== MAGIC) throw new Error('Not a columnar track file');
+  const version = prefix.getUint16(6, true);
+  if (version > SUPPORTED_VERSION) throw new Error(`Unsupported track file version ${version}`);
+  const headerLength = prefix.getUint32(8, true);
+  const headerBytes = new Uint8Array(buffer, PREFIX_SIZE, headerLength);
+  return JSON.parse(new TextDecoder().decode(headerBytes));
+}
+
+export function parseTrackColumns(buffer: ArrayBuffer): TrackColumns {
+  // Typed array views use host byte order; the file is little-endian
+  if (!isLittleEndian()) throw new Error('Columnar track files need a little-endian host');
+
+  const header = parseTrackHeader(buffer);
+  const col = (name: string) => {
+    const spec = header.columns[name];
+    if (!spec) throw new Error(`Track file is missing column ${name}`);
+    return readColumn(buffer, spec);
+  };
+
+  const id = col('id') as Int32Array;
+  const quantized = 'bbox_q' in header.columns;
+  const bbox = quantized
+    ? decodeBbox(col('bbox_q') as Int16Array, id, header.bboxScale ?? 1, header.bboxDelta ?? false)
+    : (col('bbox') as Float32Array);
+  const conf = quantized
+    ? Float32Array.from(col('conf_q') as Uint8Array, (v) => v / CONF_SCALE)
+    : (col('conf') as Float32Array);
+
+  return {
+    videoW: header.videoW,
+    videoH: header.videoH,
+    fps: header.fps,
+    numFrames: header.numFrames,
+    numRows: header.numRows,
+    frameOffsets: col('frame_offsets') as Uint32Array,
+    t: col('t') as Float64Array,
+    frame: col('frame') as Uint32Array,
+    id,
+    conf,
+    bbox,
+    flags: header.columns.flags ? (readColumn(buffer, header.columns.flags) as Uint8Array) : null,
+    shots: header.shots ?? null,
+  };
+}
+
+export async function loadTrackColumns(url: string): Promise<TrackColumns> {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error('Failed to load tracking data');
+  return parseTrackColumns(await res.arrayBuffer());
+}